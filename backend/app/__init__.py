@@ -1,8 +1,15 @@
 import os
-from flask import Flask, send_from_directory
+from flask import Flask
 
-from .extensions import db, migrate, cors, jwt
+from .extensions import (
+    db, migrate, cors, jwt, cache, media_processor, instrumentation, replicas,
+    passwords, rate_limiter, identities,
+)
 from .api import register_blueprints
+from .commands import register_commands
+from .services.engine_service import configure_engines, engine_options
+from .services.replica_service import replica_binds
+from .services.static_service import send_upload
 
 
 def create_app(config_object=None):
@@ -14,10 +21,28 @@ def create_app(config_object=None):
         config_name = os.getenv("FLASK_CONFIG", "development")
         app.config.from_object(f"config.{config_name.capitalize()}Config")
 
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS win over the DB_TUNING defaults.
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(app.config["SQLALCHEMY_DATABASE_URI"], app.config),
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+    app.config["SQLALCHEMY_BINDS"] = {
+        **replica_binds(app.config),
+        **app.config.get("SQLALCHEMY_BINDS", {}),
+    }
     db.init_app(app)
+    with app.app_context():
+        configure_engines(app, db.engines.values())
     migrate.init_app(app, db)
     cors.init_app(app)
     jwt.init_app(app)
+    identities.init_app(app)
+    cache.init_app(app)
+    media_processor.init_app(app)
+    instrumentation.init_app(app)
+    replicas.init_app(app)
+    passwords.init_app(app)
+    rate_limiter.init_app(app)
 
     upload_folder = app.config.get("UPLOAD_FOLDER", "uploads")
     if not os.path.isabs(upload_folder):
@@ -27,9 +52,10 @@ def create_app(config_object=None):
 
     @app.route("/uploads/<path:filename>")
     def uploaded_file(filename):
-        return send_from_directory(upload_folder, filename)
+        return send_upload(upload_folder, filename)
 
     register_blueprints(app)
+    register_commands(app)
     from . import models  # noqa: F401
 
     return app
@@ -2,6 +2,9 @@ from .auth import bp as auth_bp
 from .content import bp as content_bp
 from .admin import bp as admin_bp
 from .user import bp as user_bp
+from .upload import bp as upload_bp
+from .tag import bp as tag_bp
+from .friend import bp as friend_bp
 
 
 def register_blueprints(app):
@@ -9,3 +12,6 @@ def register_blueprints(app):
     app.register_blueprint(content_bp, url_prefix="/api")
     app.register_blueprint(user_bp, url_prefix="/api/users")
     app.register_blueprint(admin_bp, url_prefix="/api/admin")
+    app.register_blueprint(upload_bp, url_prefix="/api/uploads")
+    app.register_blueprint(tag_bp, url_prefix="/api/tags")
+    app.register_blueprint(friend_bp, url_prefix="/api/friends")
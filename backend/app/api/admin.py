@@ -1,26 +1,28 @@
-from flask import Blueprint, request
-from flask_jwt_extended import jwt_required
+from datetime import datetime
+
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import get_current_user, jwt_required
 
 from ..extensions import db
 from ..models import User, Post, Comment, Rating
+from ..services import bulk_delete_service
+from ..services.replica_service import read_only
 from ..utils.auth import is_admin
+from ..utils.pagination import paginate
 from ..utils.response import ok, error
 
 bp = Blueprint("admin", __name__)
 
+ROLES = ("user", "admin")
+
 
 @bp.route("/users", methods=["GET"])
 @jwt_required()
 def list_users():
     if not is_admin():
         return error("admin required", status=403)
-    page = int(request.args.get("page", 1))
-    per_page = int(request.args.get("per_page", 10))
-    pagination = User.query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    items = [user.to_dict() for user in pagination.items]
-    return ok({"items": items, "page": page, "per_page": per_page, "total": pagination.total})
+    users, meta = paginate(User.query, User, request.args)
+    return ok({"items": [user.to_dict() for user in users], **meta})
 
 
 @bp.route("/users/<int:user_id>", methods=["DELETE"])
@@ -28,12 +30,96 @@ def list_users():
 def delete_user(user_id):
     if not is_admin():
         return error("admin required", status=403)
+    if not bulk_delete_service.delete_users([user_id], get_current_user().id):
+        return error("user not found", status=404)
+    return ok({"user_id": user_id}, message="deleted")
+
+
+@bp.route("/users/<int:user_id>/role", methods=["PUT"])
+@jwt_required()
+def set_role(user_id):
+    if not is_admin():
+        return error("admin required", status=403)
+    role = (request.get_json(silent=True) or {}).get("role")
+    if role not in ROLES:
+        return error("invalid role", status=400)
     user = User.query.get(user_id)
     if not user:
         return error("user not found", status=404)
-    db.session.delete(user)
+    # Takes effect on the user's existing tokens: roles are looked up, not read from claims.
+    user.role = role
     db.session.commit()
-    return ok({"user_id": user_id}, message="deleted")
+    return ok({"user": user.to_dict()}, message="updated")
+
+
+def _bulk_criteria(payload, filters):
+    """Parse {"ids": [...], <filters>} into keyword arguments, or return an error string."""
+    criteria = {}
+    if "ids" in payload:
+        ids = payload["ids"]
+        if not isinstance(ids, list):
+            return None, "ids must be a list"
+        try:
+            criteria["ids"] = [int(value) for value in ids]
+        except (TypeError, ValueError):
+            return None, "ids must be integers"
+    for name in filters:
+        value = payload.get(name)
+        if value in (None, ""):
+            continue
+        if name in ("start_date", "end_date"):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                return None, f"invalid {name}"
+        elif name == "user_id":
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return None, "invalid user_id"
+        criteria[name] = value
+    if not criteria:
+        return None, "ids or a filter required"
+    return criteria, None
+
+
+def _bulk_delete(payload, filters, match, remove):
+    criteria, message = _bulk_criteria(payload, filters)
+    if message:
+        return error(message, status=400)
+    limit = current_app.config.get("BULK_DELETE_MAX", 5000)
+    targets = match(**criteria, limit=limit + 1)
+    deleted = remove(targets[:limit], get_current_user().id)
+    return ok(
+        {"deleted": deleted, "count": len(deleted), "has_more": len(targets) > limit},
+        message="deleted",
+    )
+
+
+@bp.route("/users/bulk-delete", methods=["POST"])
+@jwt_required()
+def bulk_delete_users():
+    if not is_admin():
+        return error("admin required", status=403)
+    return _bulk_delete(
+        request.get_json(silent=True) or {},
+        ("username_prefix", "start_date", "end_date"),
+        bulk_delete_service.matching_users,
+        bulk_delete_service.delete_users,
+    )
+
+
+@bp.route("/posts/bulk-delete", methods=["POST"])
+@jwt_required()
+def bulk_delete_posts():
+    if not is_admin():
+        return error("admin required", status=403)
+    return _bulk_delete(
+        request.get_json(silent=True) or {},
+        ("user_id", "tag", "keyword", "start_date", "end_date"),
+        bulk_delete_service.matching_posts,
+        bulk_delete_service.delete_posts,
+    )
 
 
 @bp.route("/posts", methods=["GET"])
@@ -41,13 +127,8 @@ def delete_user(user_id):
 def list_posts_admin():
     if not is_admin():
         return error("admin required", status=403)
-    page = int(request.args.get("page", 1))
-    per_page = int(request.args.get("per_page", 10))
-    pagination = Post.query.order_by(Post.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    items = [post.to_dict() for post in pagination.items]
-    return ok({"items": items, "page": page, "per_page": per_page, "total": pagination.total})
+    posts, meta = paginate(Post.query.options(*Post.listing_options()), Post, request.args)
+    return ok({"items": Post.serialize_many(posts), **meta})
 
 
 @bp.route("/posts/<int:post_id>", methods=["DELETE"])
@@ -55,16 +136,14 @@ def list_posts_admin():
 def delete_post_admin(post_id):
     if not is_admin():
         return error("admin required", status=403)
-    post = Post.query.get(post_id)
-    if not post:
+    if not bulk_delete_service.delete_posts([post_id], get_current_user().id):
         return error("post not found", status=404)
-    db.session.delete(post)
-    db.session.commit()
     return ok({"post_id": post_id}, message="deleted")
 
 
 @bp.route("/stats", methods=["GET"])
 @jwt_required()
+@read_only
 def stats():
     if not is_admin():
         return error("admin required", status=403)
@@ -1,13 +1,28 @@
-from flask import Blueprint, request
-from flask_jwt_extended import create_access_token
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import create_access_token, get_jwt, jwt_required
 
-from ..extensions import db
+from ..extensions import db, identities, passwords, rate_limiter
 from ..models import User
-from ..utils.response import ok, error
+from ..services.password_service import HasherBusy
+from ..utils.response import ok, error, retry_later
 
 bp = Blueprint("auth", __name__)
 
 
+def _throttle(*rules):
+    """429 response if any (key, limit) rule is over its window, else None."""
+    retry_after = rate_limiter.retry_after(
+        rules, current_app.config.get("AUTH_RATE_LIMIT_WINDOW", 60)
+    )
+    if retry_after:
+        return retry_later("too many attempts, try again later", 429, retry_after)
+    return None
+
+
+def _busy():
+    return retry_later("server busy, try again later", 503, 1)
+
+
 @bp.route("/register", methods=["POST"])
 def register():
     payload = request.get_json(silent=True) or {}
@@ -16,12 +31,21 @@ def register():
     if not username or not password:
         return error("username and password required", status=400)
 
+    throttled = _throttle(
+        (f"register:ip:{request.remote_addr}", current_app.config.get("AUTH_RATE_LIMIT_PER_IP", 20))
+    )
+    if throttled:
+        return throttled
+
     exists = User.query.filter_by(username=username).first()
     if exists:
         return error("username already exists", status=409)
 
     user = User(username=username)
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except HasherBusy:
+        return _busy()
     db.session.add(user)
     db.session.commit()
 
@@ -36,11 +60,34 @@ def login():
     if not username or not password:
         return error("username and password required", status=400)
 
+    config = current_app.config
+    throttled = _throttle(
+        (f"login:ip:{request.remote_addr}", config.get("AUTH_RATE_LIMIT_PER_IP", 20)),
+        (f"login:user:{username}", config.get("AUTH_RATE_LIMIT_PER_USERNAME", 5)),
+    )
+    if throttled:
+        return throttled
+
     user = User.query.filter_by(username=username).first()
-    if not user or not user.check_password(password):
+    try:
+        valid = user.check_password(password) if user else passwords.verify_dummy(password)
+        if valid and passwords.needs_rehash(user.password_hash):
+            # Legacy or outdated-cost hash: replace it while the plain password is at hand.
+            user.set_password(password)
+            db.session.commit()
+    except HasherBusy:
+        return _busy()
+    if not valid:
         return error("invalid credentials", status=401)
 
     access_token = create_access_token(
         identity=str(user.id), additional_claims={"role": user.role}
     )
     return ok({"access_token": access_token, "user": user.to_dict()}, message="logged in")
+
+
+@bp.route("/logout", methods=["POST"])
+@jwt_required()
+def logout():
+    identities.revoke(get_jwt())
+    return ok(message="logged out")
@@ -1,25 +1,36 @@
 from datetime import datetime
 
 from flask import Blueprint, request, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-
-from ..extensions import db
-from ..models import Post, Tag, Media, Comment, Rating
-from ..services.upload_service import save_media
-from ..utils.response import ok, error
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from ..extensions import db, cache, media_processor
+from ..models import Post, Tag, Comment, Rating
+from ..services import (
+    counter_service,
+    media_service,
+    search_service,
+    tag_service,
+    timeline_service,
+    visibility_service,
+)
+from ..services.replica_service import read_only
+from ..services.upload_service import (
+    UploadError,
+    extension_for,
+    max_bytes_for,
+    media_kind,
+    store_stream,
+)
+from ..utils.auth import current_viewer, is_admin
+from ..utils.pagination import get_pagination, paginate
+from ..utils.post_cache import invalidate_posts, is_anonymous, post_key, post_list_key
+from ..utils.response import ok, error, not_modified
 
 bp = Blueprint("content", __name__)
 
 
-def _get_pagination(args, default_per_page=10):
-    try:
-        page = int(args.get("page", 1))
-        per_page = int(args.get("per_page", default_per_page))
-    except (TypeError, ValueError):
-        return 1, default_per_page
-    return max(page, 1), max(1, min(per_page, 100))
-
-
 def _parse_datetime(value):
     if not value:
         return None
@@ -33,10 +44,9 @@ def _parse_tags(value):
     if value is None:
         return []
     if isinstance(value, list):
-        return [tag for tag in value if tag]
+        return tag_service.normalize_all(value)
     if isinstance(value, str):
-        cleaned = value.replace("#", " ").strip()
-        return [tag for tag in cleaned.split() if tag]
+        return tag_service.normalize_all(value.replace("#", " ").split())
     return []
 
 
@@ -53,22 +63,53 @@ def _parse_media(payload):
 
 @bp.route("/upload", methods=["POST"])
 def upload_media():
-    file_storage = request.files.get("file")
-    if not file_storage:
-        return error("file is required", status=400)
-    if not file_storage.mimetype:
-        return error("unknown file type", status=400)
-    if not (
-        file_storage.mimetype.startswith("image/")
-        or file_storage.mimetype.startswith("video/")
-    ):
+    config = current_app.config
+    if media_kind(request.mimetype):
+        # Raw body upload: stream straight from the request, no multipart spooling.
+        mimetype = request.mimetype
+        stream = request.stream
+        original = request.headers.get("X-Filename") or request.args.get("filename")
+    else:
+        if _over_limit(max_bytes_for("video", config)):
+            return error("file too large", status=413)
+        file_storage = request.files.get("file")
+        if not file_storage:
+            return error("file is required", status=400)
+        if not file_storage.mimetype:
+            return error("unknown file type", status=400)
+        mimetype = file_storage.mimetype
+        stream = file_storage.stream
+        original = file_storage.filename
+
+    media_type = media_kind(mimetype)
+    if not media_type:
         return error("unsupported file type", status=400)
+    max_bytes = max_bytes_for(media_type, config)
+    if _over_limit(max_bytes):
+        return error("file too large", status=413)
+
+    upload_dir = config.get("UPLOAD_FOLDER", "uploads")
+    try:
+        stored = store_stream(stream, upload_dir, extension_for(original, mimetype), max_bytes)
+    except UploadError as exc:
+        return error(str(exc), status=exc.status)
+    file_url = f"{request.host_url.rstrip('/')}/uploads/{stored.filename}"
+    return ok(
+        {
+            "url": file_url,
+            "filename": stored.filename,
+            "type": media_type,
+            "size": stored.size,
+            "sha256": stored.sha256,
+            "status": media_processor.submit(stored.filename, media_type),
+        }
+    )
+
 
-    upload_dir = current_app.config.get("UPLOAD_FOLDER", "uploads")
-    filename = save_media(file_storage, upload_dir)
-    file_url = f"{request.host_url.rstrip('/')}/uploads/{filename}"
-    media_type = "video" if file_storage.mimetype.startswith("video/") else "image"
-    return ok({"url": file_url, "filename": filename, "type": media_type})
+def _over_limit(max_bytes):
+    """Reject on the declared Content-Length before reading any body bytes."""
+    length = request.content_length
+    return bool(max_bytes and length and length > max_bytes)
 
 
 @bp.route("/posts", methods=["POST"])
@@ -77,77 +118,102 @@ def create_post():
     payload = request.get_json(silent=True) or {}
     user_id = get_jwt_identity()
     content = payload.get("content")
-    visibility = payload.get("visibility", "public")
+    visibility = payload.get("visibility", visibility_service.PUBLIC)
+    if visibility not in visibility_service.VISIBILITIES:
+        return error("invalid visibility", status=400)
     tags = _parse_tags(payload.get("tags"))
     media_list = _parse_media(payload)
 
     post = Post(user_id=user_id, content=content, visibility=visibility)
 
-    for name in tags:
-        if not name:
-            continue
-        tag = Tag.query.filter_by(name=name).first()
-        if not tag:
-            tag = Tag(name=name)
-        post.tags.append(tag)
+    post.tags = tag_service.resolve(tags)
 
     for item in media_list:
-        if not isinstance(item, dict):
-            continue
-        media_type = item.get("type")
-        url = item.get("url")
-        if not media_type or not url:
-            continue
-        media = Media(type=media_type, url=url, thumbnail_url=item.get("thumbnail_url"))
-        post.media_items.append(media)
+        media = media_service.build_media(item)
+        if media:
+            post.media_items.append(media)
 
     db.session.add(post)
+    db.session.flush()
+    timeline_service.fan_out(post)
     db.session.commit()
+    if media_service.refresh_pending(post):
+        db.session.commit()
+    invalidate_posts()
     return ok({"post": post.to_dict()}, message="created", status=201)
 
 
 @bp.route("/posts", methods=["GET"])
+@read_only
 def list_posts():
-    args = request.args
+    if not is_anonymous():
+        return ok(_list_posts_data(request.args, *current_viewer()))
+    return ok(cache.remember(post_list_key(request.args), lambda: _list_posts_data(request.args)))
+
+
+def _list_posts_data(args, viewer_id=None, admin=False):
     tag = args.get("tag")
     user_id = args.get("user_id")
     keyword = args.get("keyword")
     start_date = _parse_datetime(args.get("start_date"))
     end_date = _parse_datetime(args.get("end_date"))
-    page, per_page = _get_pagination(args)
 
-    query = Post.query
+    query = visibility_service.filter_visible(
+        Post.query.options(*Post.listing_options()), viewer_id, admin
+    )
     if user_id:
         query = query.filter(Post.user_id == user_id)
     if tag:
-        query = query.join(Post.tags).filter(Tag.name == tag)
+        query = query.join(Post.tags).filter(Tag.name == tag_service.normalize(tag))
+    rank = None
     if keyword:
-        query = query.filter(Post.content.ilike(f"%{keyword}%"))
+        query, rank = search_service.filter_posts(query, keyword)
     if start_date:
         query = query.filter(Post.created_at >= start_date)
     if end_date:
         query = query.filter(Post.created_at <= end_date)
 
-    pagination = query.order_by(Post.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    posts, meta = paginate(query, Post, args, rank=rank)
+    return {"items": Post.serialize_many(posts), **meta}
+
+
+@bp.route("/timeline", methods=["GET"])
+@jwt_required()
+def home_timeline():
+    _, per_page = get_pagination(request.args)
+    posts, next_cursor = timeline_service.home(
+        int(get_jwt_identity()), request.args.get("cursor"), per_page
     )
-    posts = [post.to_dict() for post in pagination.items]
     return ok(
-        {
-            "items": posts,
-            "page": page,
-            "per_page": per_page,
-            "total": pagination.total,
-        }
+        {"items": Post.serialize_many(posts), "per_page": per_page, "next_cursor": next_cursor}
     )
 
 
 @bp.route("/posts/<int:post_id>", methods=["GET"])
+@read_only
 def get_post(post_id):
-    post = Post.query.get(post_id)
-    if not post:
-        return error("post not found", status=404)
-    return ok({"post": post.to_dict()})
+    entry = cache.get(post_key(post_id)) if is_anonymous() else None
+    if entry is None:
+        post = visibility_service.get_visible(post_id, *current_viewer())
+        if not post:
+            return error("post not found", status=404)
+        etag, last_modified = post.etag, post.last_modified
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified.isoformat(),
+            "data": {"post": post.to_dict()},
+        }
+        if is_anonymous():
+            cache.set(post_key(post_id), entry)
+    else:
+        etag, last_modified = entry["etag"], datetime.fromisoformat(entry["last_modified"])
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+    return ok(entry["data"], etag=etag, last_modified=last_modified)
 
 
 @bp.route("/posts/<int:post_id>", methods=["PUT"])
@@ -155,46 +221,47 @@ def get_post(post_id):
 def update_post(post_id):
     payload = request.get_json(silent=True) or {}
     user_id = get_jwt_identity()
-    role = get_jwt().get("role")
     post = Post.query.get(post_id)
     if not post:
         return error("post not found", status=404)
-    if post.user_id != int(user_id) and role != "admin":
+    if post.user_id != int(user_id) and not is_admin():
         return error("forbidden", status=403)
 
     content = payload.get("content")
     visibility = payload.get("visibility")
+    if visibility and visibility not in visibility_service.VISIBILITIES:
+        return error("invalid visibility", status=400)
     tags = payload.get("tags")
     media_list = payload.get("media")
 
     if content is not None:
         post.content = content
+    published = False
     if visibility:
+        published = post.visibility == "private" and visibility != "private"
         post.visibility = visibility
+    post.version = Post.version + 1
 
     if tags is not None:
-        post.tags = []
-        for name in _parse_tags(tags):
-            if not name:
-                continue
-            tag = Tag.query.filter_by(name=name).first()
-            if not tag:
-                tag = Tag(name=name)
-            post.tags.append(tag)
+        post.tags = tag_service.resolve(_parse_tags(tags))
+
+    if published:
+        timeline_service.fan_out(post)
 
+    released = set()
     if media_list is not None or payload.get("mediaUrl") or payload.get("mediaType"):
+        released = media_service.digests_of([post])
         post.media_items = []
         for item in _parse_media(payload):
-            if not isinstance(item, dict):
-                continue
-            media_type = item.get("type")
-            url = item.get("url")
-            if not media_type or not url:
-                continue
-            media = Media(type=media_type, url=url, thumbnail_url=item.get("thumbnail_url"))
-            post.media_items.append(media)
+            media = media_service.build_media(item)
+            if media:
+                post.media_items.append(media)
 
     db.session.commit()
+    if media_service.refresh_pending(post):
+        db.session.commit()
+    media_service.release(released)
+    invalidate_posts(post_id)
     return ok({"post": post.to_dict()}, message="updated")
 
 
@@ -202,15 +269,17 @@ def update_post(post_id):
 @jwt_required()
 def delete_post(post_id):
     user_id = get_jwt_identity()
-    role = get_jwt().get("role")
     post = Post.query.get(post_id)
     if not post:
         return error("post not found", status=404)
-    if post.user_id != int(user_id) and role != "admin":
+    if post.user_id != int(user_id) and not is_admin():
         return error("forbidden", status=403)
 
+    released = media_service.digests_of([post])
     db.session.delete(post)
     db.session.commit()
+    media_service.release(released)
+    invalidate_posts(post_id)
     return ok({"post_id": post_id}, message="deleted")
 
 
@@ -219,7 +288,7 @@ def delete_post(post_id):
 def create_comment(post_id):
     payload = request.get_json(silent=True) or {}
     user_id = get_jwt_identity()
-    post = Post.query.get(post_id)
+    post = visibility_service.get_visible(post_id, *current_viewer())
     if not post:
         return error("post not found", status=404)
     content = (payload.get("content") or "").strip()
@@ -228,38 +297,46 @@ def create_comment(post_id):
 
     comment = Comment(post_id=post_id, user_id=user_id, content=content)
     db.session.add(comment)
+    counter_service.bump(post_id, comment_count=1)
     db.session.commit()
+    invalidate_posts(post_id)
     return ok({"comment": comment.to_dict()}, message="created", status=201)
 
 
 @bp.route("/posts/<int:post_id>/comments", methods=["GET"])
+@read_only
 def list_comments(post_id):
-    post = Post.query.get(post_id)
+    post = visibility_service.get_visible(post_id, *current_viewer())
     if not post:
         return error("post not found", status=404)
-    page, per_page = _get_pagination(request.args)
-    pagination = (
-        Comment.query.filter_by(post_id=post_id)
-        .order_by(Comment.created_at.desc())
-        .paginate(page=page, per_page=per_page, error_out=False)
-    )
-    items = [comment.to_dict() for comment in pagination.items]
+    # The post version moves with every comment write, so it also versions
+    # each page of this list.
+    etag = f"{post.etag}-comments"
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    query = Comment.query.filter_by(post_id=post_id).options(joinedload(Comment.author))
+    comments, meta = paginate(query, Comment, request.args)
+    last_modified = max((comment.created_at for comment in comments), default=None)
     return ok(
-        {
-            "items": items,
-            "page": page,
-            "per_page": per_page,
-            "total": pagination.total,
-        }
+        {"items": [comment.to_dict() for comment in comments], **meta},
+        etag=etag,
+        last_modified=last_modified,
     )
 
 
+def _rescore(rating, score):
+    counter_service.bump(rating.post_id, rating_sum=score - rating.score)
+    rating.score = score
+    db.session.commit()
+
+
 @bp.route("/posts/<int:post_id>/ratings", methods=["POST"])
 @jwt_required()
 def create_rating(post_id):
     payload = request.get_json(silent=True) or {}
     user_id = get_jwt_identity()
-    post = Post.query.get(post_id)
+    post = visibility_service.get_visible(post_id, *current_viewer())
     if not post:
         return error("post not found", status=404)
     score = payload.get("score")
@@ -272,12 +349,20 @@ def create_rating(post_id):
 
     rating = Rating.query.filter_by(post_id=post_id, user_id=user_id).first()
     if rating:
-        rating.score = score
+        _rescore(rating, score)
     else:
         rating = Rating(post_id=post_id, user_id=user_id, score=score)
         db.session.add(rating)
-
-    db.session.commit()
+        counter_service.bump(post_id, rating_sum=score, rating_count=1)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request inserted the same (post_id, user_id) first.
+            db.session.rollback()
+            rating = Rating.query.filter_by(post_id=post_id, user_id=user_id).first()
+            _rescore(rating, score)
+
+    invalidate_posts(post_id)
     return ok({"rating": rating.to_dict()}, message="saved", status=201)
 
 
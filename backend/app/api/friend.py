@@ -0,0 +1,70 @@
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from ..extensions import db
+from ..models import Friend, User
+from ..services import friend_service
+from ..utils.pagination import paginate
+from ..utils.response import ok, error
+
+bp = Blueprint("friend", __name__)
+
+
+@bp.route("", methods=["GET"])
+@jwt_required()
+def list_friends():
+    user_id = int(get_jwt_identity())
+    friends = friend_service.friend_ids(user_id).subquery()
+    query = User.query.filter(User.id.in_(db.select(friends.c.id)))
+    users, meta = paginate(query, User, request.args)
+    return ok({"items": [user.to_dict() for user in users], **meta})
+
+
+@bp.route("/requests", methods=["GET"])
+@jwt_required()
+def list_requests():
+    user_id = int(get_jwt_identity())
+    senders = db.select(Friend.user_id).where(
+        Friend.friend_id == user_id, Friend.status == friend_service.PENDING
+    )
+    users, meta = paginate(User.query.filter(User.id.in_(senders)), User, request.args)
+    return ok({"items": [user.to_dict() for user in users], **meta})
+
+
+@bp.route("/<int:other_id>", methods=["POST"])
+@jwt_required()
+def add_friend(other_id):
+    user_id = int(get_jwt_identity())
+    if other_id == user_id:
+        return error("cannot befriend yourself", status=400)
+    if not db.session.get(User, other_id):
+        return error("user not found", status=404)
+    link = friend_service.request(user_id, other_id)
+    db.session.commit()
+    return ok({"user_id": other_id, "status": link.status}, message="saved", status=201)
+
+
+@bp.route("/<int:other_id>/accept", methods=["POST"])
+@jwt_required()
+def accept_friend(other_id):
+    user_id = int(get_jwt_identity())
+    link = Friend.query.filter_by(
+        user_id=other_id, friend_id=user_id, status=friend_service.PENDING
+    ).first()
+    if not link:
+        return error("friend request not found", status=404)
+    friend_service.accept(link)
+    db.session.commit()
+    return ok({"user_id": other_id, "status": link.status}, message="accepted")
+
+
+@bp.route("/<int:other_id>", methods=["DELETE"])
+@jwt_required()
+def remove_friend(other_id):
+    user_id = int(get_jwt_identity())
+    link = friend_service.between(user_id, other_id)
+    if not link:
+        return error("friend not found", status=404)
+    friend_service.remove(link)
+    db.session.commit()
+    return ok({"user_id": other_id}, message="deleted")
@@ -0,0 +1,16 @@
+from flask import Blueprint, request
+
+from ..services import trending_service
+from ..utils.response import ok
+
+bp = Blueprint("tag", __name__)
+
+
+@bp.route("/trending", methods=["GET"])
+def trending_tags():
+    try:
+        limit = int(request.args.get("limit", 10))
+    except (TypeError, ValueError):
+        limit = 10
+    limit = max(1, limit)
+    return ok({"tags": trending_service.trending(limit)})
@@ -0,0 +1,86 @@
+from flask import Blueprint, request, current_app
+
+from ..extensions import media_processor
+from ..services import upload_session_service as sessions
+from ..services.upload_session_service import OffsetMismatch
+from ..services.upload_service import UploadError
+from ..utils.response import ok, error
+
+bp = Blueprint("upload", __name__)
+
+
+def _upload_dir():
+    return current_app.config.get("UPLOAD_FOLDER", "uploads")
+
+
+def _upload_error(exc):
+    if isinstance(exc, OffsetMismatch):
+        return ok({"offset": exc.offset}, message=str(exc), status=exc.status)
+    return error(str(exc), status=exc.status)
+
+
+@bp.route("", methods=["POST"])
+def create_upload():
+    payload = request.get_json(silent=True) or {}
+    filename = payload.get("filename") or ""
+    mimetype = payload.get("mimetype") or ""
+    try:
+        size = int(payload.get("size"))
+    except (TypeError, ValueError):
+        return error("size must be an integer", status=400)
+    try:
+        session = sessions.create(_upload_dir(), current_app.config, filename, mimetype, size)
+    except UploadError as exc:
+        return _upload_error(exc)
+    return ok(session, message="created", status=201)
+
+
+@bp.route("/<upload_id>", methods=["GET"])
+def get_upload(upload_id):
+    try:
+        return ok(sessions.status(_upload_dir(), upload_id))
+    except UploadError as exc:
+        return _upload_error(exc)
+
+
+@bp.route("/<upload_id>", methods=["PUT", "PATCH"])
+def put_chunk(upload_id):
+    offset = request.args.get("offset", request.headers.get("Upload-Offset"))
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        return error("offset must be an integer", status=400)
+    try:
+        session = sessions.write_chunk(_upload_dir(), upload_id, offset, request.stream)
+    except UploadError as exc:
+        return _upload_error(exc)
+    return ok(session)
+
+
+@bp.route("/<upload_id>/complete", methods=["POST"])
+def complete_upload(upload_id):
+    try:
+        stored, media_type = sessions.complete(_upload_dir(), upload_id)
+    except UploadError as exc:
+        return _upload_error(exc)
+    file_url = f"{request.host_url.rstrip('/')}/uploads/{stored.filename}"
+    return ok(
+        {
+            "url": file_url,
+            "filename": stored.filename,
+            "type": media_type,
+            "size": stored.size,
+            "sha256": stored.sha256,
+            "status": media_processor.submit(stored.filename, media_type),
+        }
+    )
+
+
+@bp.route("/<upload_id>", methods=["DELETE"])
+def delete_upload(upload_id):
+    try:
+        sessions.status(_upload_dir(), upload_id)
+    except UploadError as exc:
+        return _upload_error(exc)
+    sessions.discard(_upload_dir(), upload_id)
+    return ok({"upload_id": upload_id}, message="deleted")
@@ -1,9 +1,13 @@
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_current_user, get_jwt_identity
+from sqlalchemy import inspect
 
 from ..extensions import db
 from ..models import User
-from ..utils.response import ok, error
+from ..services import counter_service
+from ..services.password_service import HasherBusy
+from ..utils.post_cache import invalidate_posts
+from ..utils.response import ok, error, retry_later
 
 bp = Blueprint("user", __name__)
 
@@ -11,11 +15,8 @@ bp = Blueprint("user", __name__)
 @bp.route("/me", methods=["GET"])
 @jwt_required()
 def get_me():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user:
-        return error("user not found", status=404)
-    return ok({"user": user.to_dict()})
+    # Served from the identity cache filled while verifying the token.
+    return ok({"user": get_current_user().profile})
 
 
 @bp.route("/me", methods=["PUT"])
@@ -44,7 +45,17 @@ def update_me():
         user.avatar = avatar
 
     if password:
-        user.set_password(password)
-
+        try:
+            user.set_password(password)
+        except HasherBusy:
+            return retry_later("server busy, try again later", 503, 1)
+
+    # Posts and comment lists embed the author's name and avatar.
+    profile = inspect(user).attrs
+    touched = set()
+    if profile.username.history.has_changes() or profile.avatar.history.has_changes():
+        touched = counter_service.touch_author(user.id)
     db.session.commit()
+    if touched:
+        invalidate_posts(*touched)
     return ok({"user": user.to_dict()}, message="updated")
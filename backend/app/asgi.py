@@ -0,0 +1,193 @@
+"""ASGI adapter around the Flask app, served by e.g. ``uvicorn asgi:app``.
+
+The event loop owns the connections. A request body is received on the loop
+into a spooled temp file. The first ``ASGI_SPOOL_BYTES`` stay in memory and
+the rest are written to disk from the executor, so the loop never blocks.
+``MAX_CONTENT_LENGTH`` is enforced while receiving. Only then does the
+request take one of ``ASGI_THREADS`` threads to run the WSGI app, and
+response chunks go back to the loop as they are produced. A slow upload or
+an idle keep-alive connection therefore costs a coroutine, not a thread,
+and the threads only spend time inside views.
+
+Views stay synchronous. Flask runs an ``async def`` view on a private event
+loop per call, so an async engine could not share pooled connections
+between requests. Database waits release the GIL inside the thread pool
+instead.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Responses up to this size are sent by the loop in one go after the view returns.
+BUFFER_BYTES = 256 * 1024
+
+
+def _content_length(scope):
+    for name, value in scope.get("headers", ()):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def _reject(send, status, body=b""):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"text/plain"), (b"content-length", b"%d" % len(body))],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def build_environ(scope, body, length):
+    """WSGI environ for a request whose ``length`` body bytes are already in ``body``."""
+    script_name = scope.get("root_path", "").encode("utf8").decode("latin1")
+    path_info = scope["path"].encode("utf8").decode("latin1")
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "SERVER_SOFTWARE": "asgi-adapter",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for raw_name, raw_value in scope.get("headers", ()):
+        name = raw_name.decode("latin1").upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        if name not in ("CONTENT_LENGTH", "CONTENT_TYPE"):
+            name = f"HTTP_{name}"
+        if name in environ:
+            value = f"{environ[name]}{'; ' if name == 'HTTP_COOKIE' else ','}{value}"
+        environ[name] = value
+    # The body has been received in full, so its length is known even for a
+    # chunked request. Werkzeug ignores CONTENT_LENGTH under Transfer-Encoding:
+    # chunked and would read such a body as empty unless the input is marked
+    # terminated.
+    environ["CONTENT_LENGTH"] = str(length)
+    environ["wsgi.input_terminated"] = True
+    return environ
+
+
+class AsgiAdapter:
+    def __init__(self, wsgi_app):
+        config = wsgi_app.config
+        self.app = wsgi_app
+        self.max_body = config.get("MAX_CONTENT_LENGTH")
+        self.spool_bytes = config.get("ASGI_SPOOL_BYTES", 1024 * 1024)
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.get("ASGI_THREADS", 32), thread_name_prefix="asgi"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        length = _content_length(scope)
+        if self.max_body and length is not None and length > self.max_body:
+            await _reject(send, 413, b"request body too large")
+            return
+        loop = asyncio.get_running_loop()
+        with tempfile.SpooledTemporaryFile(max_size=self.spool_bytes) as body:
+            received = 0
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunk = message.get("body", b"")
+                received += len(chunk)
+                if self.max_body and received > self.max_body:
+                    await _reject(send, 413, b"request body too large")
+                    return
+                if received > self.spool_bytes:
+                    await loop.run_in_executor(None, body.write, chunk)
+                else:
+                    body.write(chunk)
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            environ = build_environ(scope, body, received)
+            messages = await loop.run_in_executor(self.executor, self._run, environ, send, loop)
+        for message in messages:
+            await send(message)
+
+    def _run(self, environ, send, loop):
+        """Run the WSGI app in a worker thread.
+
+        Output is buffered and handed back as the return value, so a typical
+        JSON response costs a single thread-to-loop handoff. Only bodies
+        larger than BUFFER_BYTES are streamed to the loop chunk by chunk.
+        """
+        response = {"buffered": [], "size": 0, "streaming": False}
+
+        def emit(message):
+            if not response["streaming"]:
+                response["buffered"].append(message)
+                response["size"] += len(message.get("body", b""))
+                if response["size"] <= BUFFER_BYTES:
+                    return
+                response["streaming"] = True
+                messages, response["buffered"] = response["buffered"], []
+                for message in messages:
+                    asyncio.run_coroutine_threadsafe(send(message), loop).result()
+                return
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def write(data):
+            if "start" in response:
+                emit(response.pop("start"))
+            if data:
+                emit({"type": "http.response.body", "body": data, "more_body": True})
+
+        def start_response(status, headers, exc_info=None):
+            response["start"] = {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [
+                    (name.lower().encode("latin1"), value.encode("latin1"))
+                    for name, value in headers
+                ],
+            }
+            return write
+
+        iterable = self.app(environ, start_response)
+        try:
+            for chunk in iterable:
+                if chunk:
+                    write(chunk)
+            write(b"")
+            emit({"type": "http.response.body", "body": b""})
+        finally:
+            close = getattr(iterable, "close", None)
+            if close:
+                close()
+        return response["buffered"]
@@ -0,0 +1,67 @@
+import click
+from flask import current_app
+
+from .extensions import db
+from .models import User
+from .services import (
+    counter_service,
+    media_service,
+    search_service,
+    timeline_service,
+    trending_service,
+    upload_session_service,
+)
+
+
+def register_commands(app):
+    @app.cli.command("search-reindex")
+    def search_reindex():
+        """Rebuild the post full-text search index."""
+        if not search_service.backend():
+            click.echo("no search index table; run `flask db upgrade` first")
+            return
+        count = search_service.rebuild()
+        click.echo(f"indexed {count} posts")
+
+    @app.cli.command("repair-counters")
+    def repair_counters():
+        """Recompute post rating/comment counters from the source tables."""
+        count = counter_service.recompute()
+        db.session.commit()
+        click.echo(f"recomputed counters for {count} posts")
+
+    @app.cli.command("purge-upload-sessions")
+    def purge_upload_sessions():
+        """Delete expired resumable upload sessions."""
+        removed = upload_session_service.purge_expired(current_app.config["UPLOAD_FOLDER"])
+        click.echo(f"removed {removed} expired upload sessions")
+
+    @app.cli.command("gc-media")
+    def gc_media():
+        """Delete uploaded blobs no post references once past the grace period."""
+        removed = media_service.sweep()
+        click.echo(f"removed {len(removed)} unreferenced media blobs")
+
+    @app.cli.command("rebuild-trending")
+    def rebuild_trending():
+        """Recount trending tag usage buckets from post_tags."""
+        count = trending_service.rebuild()
+        click.echo(f"wrote {count} tag usage buckets")
+
+    @app.cli.command("prune-trending")
+    def prune_trending():
+        """Delete tag usage buckets older than the trending window."""
+        removed = trending_service.prune()
+        click.echo(f"removed {removed} tag usage buckets")
+
+    @app.cli.command("rebuild-timelines")
+    def rebuild_timelines():
+        """Recompute every user's home timeline from friends and posts."""
+        count = 0
+        for (user_id,) in db.session.execute(db.select(User.id)).all():
+            timeline_service.rebuild(user_id)
+            count += 1
+            if count % 500 == 0:
+                db.session.commit()
+        db.session.commit()
+        click.echo(f"rebuilt {count} timelines")
@@ -3,9 +3,24 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 
+from .services.cache_service import ResponseCache
+from .services.identity_service import IdentityCache
+from .services.metrics_service import Instrumentation
+from .services.password_service import PasswordHasher
+from .services.rate_limit_service import RateLimiter
+from .services.replica_service import ReplicaRouter, RoutingSession
+from .services.thumbnail_service import MediaProcessor
+
 # Extension instances are initialized in app factory
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 cors = CORS()
 jwt = JWTManager()
+cache = ResponseCache()
+media_processor = MediaProcessor()
+instrumentation = Instrumentation()
+replicas = ReplicaRouter()
+passwords = PasswordHasher()
+rate_limiter = RateLimiter()
+identities = IdentityCache()
@@ -3,9 +3,11 @@ from .post import Post
 from .media import Media
 from .tag import Tag
 from .post_tag import PostTag
+from .tag_usage import TagUsage
 from .comment import Comment
 from .rating import Rating
 from .friend import Friend
+from .timeline import TimelineEntry
 from .admin_log import AdminLog
 
 __all__ = [
@@ -14,8 +16,10 @@ __all__ = [
     "Media",
     "Tag",
     "PostTag",
+    "TagUsage",
     "Comment",
     "Rating",
     "Friend",
+    "TimelineEntry",
     "AdminLog",
 ]
@@ -5,7 +5,8 @@ class AdminLog(db.Model):
     __tablename__ = "admin_logs"
 
     id = db.Column(db.Integer, primary_key=True)
-    admin_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # No foreign key: the audit trail has to outlive the admins it names.
+    admin_id = db.Column(db.Integer, nullable=False)
     action = db.Column(db.String(64), nullable=False)
     target_type = db.Column(db.String(32))
     target_id = db.Column(db.Integer)
@@ -3,9 +3,13 @@ from ..extensions import db
 
 class Friend(db.Model):
     __tablename__ = "friends"
+    __table_args__ = (
+        db.Index("ix_friends_user_id_friend_id", "user_id", "friend_id"),
+        db.Index("ix_friends_friend_id", "friend_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    friend_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    friend_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     status = db.Column(db.String(16), default="pending", nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
@@ -1,14 +1,27 @@
+import json
+
 from ..extensions import db
 
 
 class Media(db.Model):
     __tablename__ = "media"
+    __table_args__ = (
+        db.Index("ix_media_post_id", "post_id"),
+        db.Index("ix_media_digest", "digest"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    post_id = db.Column(db.Integer, db.ForeignKey("posts.id"), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
     type = db.Column(db.String(16), nullable=False)
     url = db.Column(db.String(255), nullable=False)
     thumbnail_url = db.Column(db.String(255))
+    # SHA-256 of the stored blob for content-addressed uploads; rows sharing a
+    # digest share one file, which is deleted when the last row goes.
+    digest = db.Column(db.String(64))
+    # Derived-file processing: pending / ready / failed / skipped, and a JSON
+    # map of variant name ("320", "640", "poster") to URL.
+    status = db.Column(db.String(16))
+    variants = db.Column(db.Text)
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
 
     post = db.relationship("Post", back_populates="media_items")
@@ -19,4 +32,6 @@ class Media(db.Model):
             "type": self.type,
             "url": self.url,
             "thumbnail_url": self.thumbnail_url,
+            "status": self.status,
+            "variants": json.loads(self.variants) if self.variants else {},
         }
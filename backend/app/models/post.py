@@ -1,22 +1,63 @@
+from sqlalchemy.orm import joinedload, selectinload
+
 from ..extensions import db
 
 
 class Post(db.Model):
     __tablename__ = "posts"
+    __table_args__ = (
+        db.Index("ix_posts_created_at_id", "created_at", "id"),
+        db.Index("ix_posts_user_id_created_at", "user_id", "created_at", "id"),
+        db.Index("ix_posts_visibility_created_at", "visibility", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     content = db.Column(db.Text)
     visibility = db.Column(db.String(16), default="public", nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
     updated_at = db.Column(db.DateTime, onupdate=db.func.now())
+    # Denormalized aggregates maintained by services.counter_service.
+    rating_sum = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    rating_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    comment_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    # Bumped on every change that alters to_dict() or the comment list; feeds ETags.
+    version = db.Column(db.Integer, default=1, server_default="1", nullable=False)
 
     author = db.relationship("User", back_populates="posts")
-    media_items = db.relationship("Media", back_populates="post", cascade="all, delete-orphan")
-    comments = db.relationship("Comment", back_populates="post", cascade="all, delete-orphan")
-    ratings = db.relationship("Rating", back_populates="post", cascade="all, delete-orphan")
+    # passive_deletes: the database cascades, so deleting a post does not load its children.
+    media_items = db.relationship(
+        "Media", back_populates="post", cascade="all, delete-orphan", passive_deletes=True
+    )
+    comments = db.relationship(
+        "Comment", back_populates="post", cascade="all, delete-orphan", passive_deletes=True
+    )
+    ratings = db.relationship(
+        "Rating", back_populates="post", cascade="all, delete-orphan", passive_deletes=True
+    )
     tags = db.relationship("Tag", secondary="post_tags", back_populates="posts")
 
+    @classmethod
+    def listing_options(cls):
+        """Loader options that fetch everything to_dict touches up front."""
+        return (
+            joinedload(cls.author),
+            selectinload(cls.tags),
+            selectinload(cls.media_items),
+        )
+
+    @classmethod
+    def serialize_many(cls, posts):
+        return [post.to_dict() for post in posts]
+
+    @property
+    def etag(self):
+        return f"post-{self.id}-v{self.version}"
+
+    @property
+    def last_modified(self):
+        return self.updated_at or self.created_at
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -27,6 +68,9 @@ class Post(db.Model):
             "visibility": self.visibility,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "rating_avg": round(self.rating_sum / self.rating_count, 2) if self.rating_count else None,
+            "rating_count": self.rating_count,
+            "comment_count": self.comment_count,
             "tags": [tag.name for tag in self.tags],
             "media": [media.to_dict() for media in self.media_items],
         }
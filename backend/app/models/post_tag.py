@@ -3,6 +3,7 @@ from ..extensions import db
 
 class PostTag(db.Model):
     __tablename__ = "post_tags"
+    __table_args__ = (db.Index("ix_post_tags_tag_id", "tag_id", "post_id"),)
 
-    post_id = db.Column(db.Integer, db.ForeignKey("posts.id"), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
     tag_id = db.Column(db.Integer, db.ForeignKey("tags.id"), primary_key=True)
@@ -3,10 +3,13 @@ from ..extensions import db
 
 class Rating(db.Model):
     __tablename__ = "ratings"
+    __table_args__ = (
+        db.Index("uq_ratings_post_id_user_id", "post_id", "user_id", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    post_id = db.Column(db.Integer, db.ForeignKey("posts.id"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     score = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
 
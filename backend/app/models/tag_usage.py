@@ -0,0 +1,13 @@
+from ..extensions import db
+
+
+class TagUsage(db.Model):
+    """Number of posts created in one time bucket that carry a tag."""
+
+    __tablename__ = "tag_usage"
+    __table_args__ = (db.Index("ix_tag_usage_bucket", "bucket"),)
+
+    tag_id = db.Column(db.Integer, db.ForeignKey("tags.id"), primary_key=True)
+    # Bucket number: unix time // TRENDING_BUCKET_SECONDS.
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
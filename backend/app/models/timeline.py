@@ -0,0 +1,16 @@
+from ..extensions import db
+
+
+class TimelineEntry(db.Model):
+    """One post in a user's precomputed home timeline (fan-out-on-write)."""
+
+    __tablename__ = "timeline_entries"
+    __table_args__ = (
+        db.Index("ix_timeline_entries_user_id_created_at", "user_id", "created_at", "post_id"),
+        db.Index("ix_timeline_entries_post_id", "post_id"),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    # Copy of posts.created_at so the timeline can be paged from this table alone.
+    created_at = db.Column(db.DateTime, nullable=False)
@@ -1,10 +1,9 @@
-from werkzeug.security import generate_password_hash, check_password_hash
-
-from ..extensions import db
+from ..extensions import db, passwords
 
 
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (db.Index("ix_users_created_at_id", "created_at", "id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
@@ -12,16 +11,24 @@ class User(db.Model):
     role = db.Column(db.String(16), default="user", nullable=False)
     avatar = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    # Accepted friendships, maintained by services.friend_service.
+    friend_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
 
+    # Posts stay non-passive so their flush listeners (search, trending) run;
+    # services.bulk_delete_service removes users without the ORM.
     posts = db.relationship("Post", back_populates="author", cascade="all, delete-orphan")
-    comments = db.relationship("Comment", back_populates="author", cascade="all, delete-orphan")
-    ratings = db.relationship("Rating", back_populates="author", cascade="all, delete-orphan")
+    comments = db.relationship(
+        "Comment", back_populates="author", cascade="all, delete-orphan", passive_deletes=True
+    )
+    ratings = db.relationship(
+        "Rating", back_populates="author", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password, method="pbkdf2:sha256")
+        self.password_hash = passwords.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify(self.password_hash, password)
 
     def to_dict(self):
         return {
@@ -29,5 +36,6 @@ class User(db.Model):
             "username": self.username,
             "role": self.role,
             "avatar": self.avatar,
+            "friend_count": self.friend_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
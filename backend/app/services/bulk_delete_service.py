@@ -0,0 +1,158 @@
+"""Set-based deletion of posts and users for the admin endpoints.
+
+``db.session.delete`` loads every child row of a post or user and deletes
+them one by one, which times out on prolific accounts. Here ids are
+processed in chunks of ``BULK_DELETE_CHUNK``, a few statements per chunk.
+The database removes comments, ratings, media, tag links, friendships and
+timeline entries through ``ON DELETE CASCADE``. Each chunk commits on its
+own, so locks stay short and an interrupted run keeps the chunks it
+finished.
+
+Plain DELETE statements skip the flush listeners, so each chunk does their
+work itself:
+- search index rows and tag_usage, plus the in-process trending scores;
+- counters of other users' posts that the deleted users commented on or
+  rated, and the friend counts of their friends;
+- the identity cache.
+After a chunk commits, its posts leave the response cache and any media
+blobs it freed go to the background cleaner. Every deleted target gets an
+``AdminLog`` row in the same transaction. Posts deleted along with their
+author are covered by the author's row.
+"""
+from flask import current_app
+from sqlalchemy import delete, select
+
+from ..extensions import db
+from ..models import AdminLog, Post, Tag, User
+from ..utils.post_cache import invalidate_posts
+from . import (
+    counter_service,
+    friend_service,
+    identity_service,
+    media_service,
+    search_service,
+    tag_service,
+    trending_service,
+)
+
+
+def _chunk_size():
+    return current_app.config.get("BULK_DELETE_CHUNK", 500)
+
+
+def _chunks(ids):
+    ids = sorted(set(ids))
+    size = _chunk_size()
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _log(admin_id, action, target_type, target_ids):
+    db.session.execute(
+        db.insert(AdminLog),
+        [
+            {
+                "admin_id": admin_id,
+                "action": action,
+                "target_type": target_type,
+                "target_id": target_id,
+            }
+            for target_id in target_ids
+        ],
+    )
+
+
+def matching_posts(ids=None, user_id=None, tag=None, keyword=None, start_date=None,
+                   end_date=None, limit=None):
+    """Ids of posts selected by an id list and/or the listing filters."""
+    query = db.session.query(Post.id)
+    if ids is not None:
+        query = query.filter(Post.id.in_(ids))
+    if user_id is not None:
+        query = query.filter(Post.user_id == user_id)
+    if tag:
+        query = query.join(Post.tags).filter(Tag.name == tag_service.normalize(tag))
+    if keyword:
+        query, _ = search_service.filter_posts(query, keyword)
+    if start_date:
+        query = query.filter(Post.created_at >= start_date)
+    if end_date:
+        query = query.filter(Post.created_at <= end_date)
+    return [row.id for row in query.order_by(Post.id).limit(limit)]
+
+
+def matching_users(ids=None, username_prefix=None, start_date=None, end_date=None, limit=None):
+    """Ids of non-admin users selected by an id list and/or signup filters.
+
+    Admins are never matched; demote them first.
+    """
+    query = db.session.query(User.id).filter(User.role != "admin")
+    if ids is not None:
+        query = query.filter(User.id.in_(ids))
+    if username_prefix:
+        escaped = username_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(User.username.like(f"{escaped}%", escape="\\"))
+    if start_date:
+        query = query.filter(User.created_at >= start_date)
+    if end_date:
+        query = query.filter(User.created_at <= end_date)
+    return [row.id for row in query.order_by(User.id).limit(limit)]
+
+
+def _delete_post_chunk(post_ids, admin_id=None):
+    digests = media_service.digests_of_posts(post_ids)
+    search_service.remove_posts(post_ids)
+    trending_service.discount_posts(post_ids)
+    if admin_id is not None:
+        _log(admin_id, "delete_post", "post", post_ids)
+    db.session.execute(
+        delete(Post).where(Post.id.in_(post_ids)).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    invalidate_posts(*post_ids)
+    media_service.release_later(digests)
+
+
+def delete_posts(post_ids, admin_id):
+    """Delete posts by id; returns the ids that existed."""
+    deleted = []
+    for chunk in _chunks(post_ids):
+        existing = list(db.session.scalars(select(Post.id).where(Post.id.in_(chunk))))
+        if existing:
+            _delete_post_chunk(existing, admin_id)
+            deleted += existing
+    return deleted
+
+
+def delete_users(user_ids, admin_id):
+    """Delete users with everything they own; returns the ids that existed."""
+    deleted = []
+    for chunk in _chunks(user_ids):
+        existing = list(db.session.scalars(select(User.id).where(User.id.in_(chunk))))
+        if not existing:
+            continue
+        # Their posts go first, in chunks of their own, so that one prolific
+        # account is not one huge transaction.
+        while True:
+            post_ids = list(
+                db.session.scalars(
+                    select(Post.id).where(Post.user_id.in_(existing)).limit(_chunk_size())
+                )
+            )
+            if not post_ids:
+                break
+            _delete_post_chunk(post_ids)
+        touched = counter_service.posts_touched_by(existing)
+        friend_service.forget(existing)
+        identity_service.expire(db.session, existing)
+        _log(admin_id, "delete_user", "user", existing)
+        db.session.execute(
+            delete(User).where(User.id.in_(existing)).execution_options(synchronize_session=False)
+        )
+        # The cascade has removed their comments and ratings by now.
+        for touched_chunk in _chunks(touched):
+            counter_service.recompute(touched_chunk)
+        db.session.commit()
+        invalidate_posts(*touched)
+        deleted += existing
+    return deleted
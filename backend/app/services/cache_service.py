@@ -0,0 +1,165 @@
+"""Response data cache with an in-process LRU backend and a shared Redis one.
+
+Select the backend with ``CACHE_BACKEND`` ("memory", "redis" or "null").
+The memory backend only sees invalidations made by its own process; use the
+redis backend when running several workers.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class NullBackend:
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def incr(self, key):
+        return 0
+
+    def counter(self, key):
+        return 0
+
+    def clear(self):
+        pass
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def incr(self, key):
+        # Counters live outside the LRU so they are never evicted.
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class RedisBackend:
+    """Shared backend; values are stored as JSON."""
+
+    def __init__(self, url, prefix="rg:"):
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package") from exc
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl or None)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """Flask extension wrapping the configured backend.
+
+    Keys are plain strings. Groups of keys that must be dropped together
+    (e.g. every cached listing page) embed a namespace generation number;
+    ``bump`` moves the namespace to a new generation so stale entries are
+    never read again and simply age out.
+    """
+
+    def init_app(self, app):
+        kind = app.config.get("CACHE_BACKEND", "memory")
+        if kind == "redis":
+            backend = RedisBackend(app.config.get("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        elif kind == "memory":
+            backend = MemoryBackend(app.config.get("CACHE_MAX_ENTRIES", 1024))
+        else:
+            backend = NullBackend()
+        app.extensions["response_cache"] = backend
+
+    @property
+    def backend(self):
+        return current_app.extensions["response_cache"]
+
+    @property
+    def default_ttl(self):
+        return current_app.config.get("CACHE_DEFAULT_TTL", 60)
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl or self.default_ttl)
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def remember(self, key, factory, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def generation(self, namespace):
+        return self.backend.counter(f"gen:{namespace}")
+
+    def bump(self, namespace):
+        self.backend.incr(f"gen:{namespace}")
@@ -0,0 +1,81 @@
+from sqlalchemy import func, or_, select, update
+
+from ..extensions import db
+from ..models import Comment, Post, Rating
+
+
+def bump(post_id, rating_sum=0, rating_count=0, comment_count=0):
+    """Atomically add deltas to a post's counters in the current transaction.
+
+    The increment happens in SQL so concurrent writers cannot lose updates,
+    and updated_at is pinned so counter churn does not look like an edit.
+    """
+    db.session.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(
+            rating_sum=Post.rating_sum + rating_sum,
+            rating_count=Post.rating_count + rating_count,
+            comment_count=Post.comment_count + comment_count,
+            version=Post.version + 1,
+            updated_at=Post.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recompute(post_ids=None):
+    """Recalculate counters from comments/ratings in one set-based UPDATE.
+
+    Limits the pass to `post_ids` when given; returns the number of rows
+    touched.
+    """
+    rating_sum = (
+        select(func.coalesce(func.sum(Rating.score), 0))
+        .where(Rating.post_id == Post.id)
+        .scalar_subquery()
+    )
+    rating_count = select(func.count(Rating.id)).where(Rating.post_id == Post.id).scalar_subquery()
+    comment_count = (
+        select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    )
+    statement = update(Post).values(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        comment_count=comment_count,
+        version=Post.version + 1,
+        updated_at=Post.updated_at,
+    )
+    if post_ids is not None:
+        statement = statement.where(Post.id.in_(post_ids))
+    result = db.session.execute(statement.execution_options(synchronize_session=False))
+    return result.rowcount
+
+
+def posts_touched_by(user_ids):
+    """Ids of posts whose counters include comments or ratings by these users."""
+    commented = select(Comment.post_id).where(Comment.user_id.in_(user_ids))
+    rated = select(Rating.post_id).where(Rating.user_id.in_(user_ids))
+    return set(db.session.scalars(commented.union(rated)))
+
+
+def touch_author(user_id):
+    """Move on the ETags of posts that show `user_id`'s username and avatar.
+
+    That is their own posts, and posts they commented on, whose comment
+    list is versioned by the post. Call when the profile changes; returns
+    the post ids so the caller can invalidate cached copies after commit.
+    """
+    shown = or_(
+        Post.user_id == user_id,
+        Post.id.in_(select(Comment.post_id).where(Comment.user_id == user_id)),
+    )
+    post_ids = set(db.session.scalars(select(Post.id).where(shown)))
+    if post_ids:
+        db.session.execute(
+            update(Post)
+            .where(shown)
+            .values(version=Post.version + 1, updated_at=Post.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    return post_ids
@@ -0,0 +1,69 @@
+"""Production engine tuning, enabled with ``DB_TUNING`` (on in ProductionConfig).
+
+SQLite connections switch to WAL, so readers never block the writer and the
+writer never blocks readers. They also use ``synchronous=NORMAL``, which is
+durable in WAL except for the last commits on power loss. A
+``busy_timeout`` makes concurrent writers wait for the lock instead of
+failing with "database is locked", and ``mmap_size`` maps the file for
+reads.
+
+SQLite foreign keys are enforced on every connection, tuned or not. The
+``ON DELETE CASCADE`` clauses bulk deletes rely on depend on it.
+
+Server databases get an explicit QueuePool with pre-ping, which drops
+connections the server closed. Connections are recycled before idle
+timeouts on the server or proxy, and PostgreSQL sessions get a
+``statement_timeout``.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def engine_options(url, config):
+    """Engine keyword arguments for `url`; empty unless DB_TUNING is set."""
+    if not config.get("DB_TUNING"):
+        return {}
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return {}
+    options = {
+        "poolclass": QueuePool,
+        "pool_size": config.get("DB_POOL_SIZE", 10),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 20),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+    }
+    timeout = config.get("DB_STATEMENT_TIMEOUT_MS", 30000)
+    if url.get_backend_name() == "postgresql" and timeout:
+        options["connect_args"] = {"options": f"-c statement_timeout={int(timeout)}"}
+    return options
+
+
+def sqlite_pragmas(config):
+    return [
+        f"PRAGMA journal_mode={config.get('SQLITE_JOURNAL_MODE', 'WAL')}",
+        f"PRAGMA synchronous={config.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+    ]
+
+
+def configure_engines(app, engines):
+    """Attach the SQLite connect-time pragmas to every SQLite engine."""
+    pragmas = ["PRAGMA foreign_keys=ON"]
+    if app.config.get("DB_TUNING"):
+        pragmas += sqlite_pragmas(app.config)
+    for engine in engines:
+        if engine.dialect.name != "sqlite":
+            continue
+
+        @event.listens_for(engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
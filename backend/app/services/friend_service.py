@@ -0,0 +1,133 @@
+"""Friendships on top of the ``friends`` table.
+
+A friendship is one row in either direction: ``user_id`` sent the request
+to ``friend_id`` and ``status`` goes from "pending" to "accepted". Accepting
+or removing a friendship keeps ``users.friend_count`` and both home
+timelines in step.
+"""
+from sqlalchemy import and_, func, or_, select, union_all, update
+
+from ..extensions import db
+from ..models import Friend, User
+from . import identity_service, timeline_service
+
+PENDING = "pending"
+ACCEPTED = "accepted"
+
+
+def friend_id_selects(user_id):
+    """The two halves of `friend_ids`, for callers that extend the UNION."""
+    return (
+        select(Friend.friend_id.label("id")).where(
+            Friend.user_id == user_id, Friend.status == ACCEPTED
+        ),
+        select(Friend.user_id.label("id")).where(
+            Friend.friend_id == user_id, Friend.status == ACCEPTED
+        ),
+    )
+
+
+def friend_ids(user_id):
+    """SELECT of the ids of `user_id`'s accepted friends (column ``id``)."""
+    return union_all(*friend_id_selects(user_id))
+
+
+def between(user_id, other_id):
+    """Return the row linking two users in either direction, or None."""
+    return Friend.query.filter(
+        or_(
+            and_(Friend.user_id == user_id, Friend.friend_id == other_id),
+            and_(Friend.user_id == other_id, Friend.friend_id == user_id),
+        )
+    ).first()
+
+
+def _bump_counts(user_ids, delta):
+    db.session.execute(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(friend_count=User.friend_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    # Cached identities carry friend_count.
+    identity_service.expire(db.session, user_ids)
+
+
+def request(user_id, other_id):
+    """Send a friend request; accepts it instead if `other_id` already asked."""
+    link = between(user_id, other_id)
+    if link is None:
+        link = Friend(user_id=user_id, friend_id=other_id, status=PENDING)
+        db.session.add(link)
+        return link
+    if link.status == PENDING and link.user_id == other_id:
+        accept(link)
+    return link
+
+
+def accept(link):
+    link.status = ACCEPTED
+    db.session.flush()
+    _bump_counts([link.user_id, link.friend_id], 1)
+    timeline_service.backfill(link.user_id, link.friend_id)
+    timeline_service.backfill(link.friend_id, link.user_id)
+
+
+def remove(link):
+    """Delete a friendship or a pending request."""
+    if link.status == ACCEPTED:
+        _bump_counts([link.user_id, link.friend_id], -1)
+        timeline_service.unlink(link.user_id, link.friend_id)
+        timeline_service.unlink(link.friend_id, link.user_id)
+    db.session.delete(link)
+
+
+def forget(user_ids):
+    """Drop every friendship of users that are about to be deleted.
+
+    Each remaining user loses one friend per deleted friend, in one UPDATE.
+    """
+    user_ids = list(user_ids)
+    lost = (
+        select(func.count(Friend.id))
+        .where(
+            Friend.status == ACCEPTED,
+            or_(
+                and_(Friend.user_id == User.id, Friend.friend_id.in_(user_ids)),
+                and_(Friend.friend_id == User.id, Friend.user_id.in_(user_ids)),
+            ),
+        )
+        .scalar_subquery()
+    )
+    friends = union_all(
+        select(Friend.friend_id).where(Friend.user_id.in_(user_ids), Friend.status == ACCEPTED),
+        select(Friend.user_id).where(Friend.friend_id.in_(user_ids), Friend.status == ACCEPTED),
+    )
+    db.session.execute(
+        update(User)
+        .where(User.id.in_(friends.subquery().select()), User.id.notin_(user_ids))
+        .values(friend_count=User.friend_count - lost)
+        .execution_options(synchronize_session=False)
+    )
+    identity_service.expire_all(db.session)
+    db.session.execute(
+        db.delete(Friend)
+        .where(or_(Friend.user_id.in_(user_ids), Friend.friend_id.in_(user_ids)))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recount():
+    """Recompute every users.friend_count from accepted friendships."""
+    accepted = (
+        select(func.count(Friend.id))
+        .where(
+            Friend.status == ACCEPTED,
+            or_(Friend.user_id == User.id, Friend.friend_id == User.id),
+        )
+        .scalar_subquery()
+    )
+    db.session.execute(
+        update(User).values(friend_count=accepted).execution_options(synchronize_session=False)
+    )
+    identity_service.expire_all(db.session)
@@ -0,0 +1,184 @@
+"""JWT identity lookup with a short-lived cache, and token revocation.
+
+Every request with a bearer token resolves the token's user through
+flask-jwt-extended's ``user_lookup_loader``. ``get_current_user()`` then
+returns an ``Identity`` with the user's current role and profile. The role
+comes from the database, not from the token, so admin checks see a demotion
+and a deleted user's tokens stop working. Lookups are cached in an
+in-process LRU for ``IDENTITY_CACHE_TTL`` seconds (``IDENTITY_CACHE_SIZE``
+entries), so a burst of requests from one user costs one query.
+Flushing a changed or deleted ``User`` drops its entry once the transaction
+commits. Bulk statements that bypass the ORM, such as friend-count updates,
+call ``expire``/``expire_all`` instead. Other processes keep their copy
+until the TTL runs out, so keep it short.
+
+``POST /auth/logout`` puts the token's ``jti`` on a blocklist until the token
+would have expired anyway. The blocklist is a dict in process memory. With
+``CACHE_BACKEND=redis`` it is stored in redis instead, so every worker sees
+a revocation. The memory response cache is not used for it, because its
+LRU could evict a revocation.
+"""
+import heapq
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..utils.response import error
+from .cache_service import MemoryBackend, RedisBackend
+
+# session.info key: user ids to drop from the cache on commit, or ALL.
+STALE = "identities_stale"
+ALL = "all"
+
+
+class Identity(namedtuple("Identity", "id role profile")):
+    """What a request needs to know about its user; ``profile`` is ``User.to_dict()``."""
+
+    @property
+    def is_admin(self):
+        return self.role == "admin"
+
+
+class Blocklist:
+    """Revoked token ids, each kept until its token expires."""
+
+    def __init__(self):
+        self._revoked = {}
+        self._expiry = []
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, ttl):
+        expires_at = time.time() + ttl
+        with self._lock:
+            now = time.time()
+            while self._expiry and self._expiry[0][0] <= now:
+                _, expired = heapq.heappop(self._expiry)
+                if self._revoked.get(expired, now + 1) <= now:
+                    del self._revoked[expired]
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._expiry, (expires_at, jti))
+
+    def is_revoked(self, jti):
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+
+class SharedBlocklist:
+    """Blocklist kept in the redis cache backend, shared by all workers."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def revoke(self, jti, ttl):
+        self.backend.set(f"revoked:{jti}", 1, max(1, int(ttl)))
+
+    def is_revoked(self, jti):
+        return self.backend.get(f"revoked:{jti}") is not None
+
+
+class IdentityCache:
+    """Flask extension registering the JWT user loader and blocklist check."""
+
+    def init_app(self, app):
+        app.extensions["identities"] = MemoryBackend(app.config.get("IDENTITY_CACHE_SIZE", 10000))
+        app.extensions["token_blocklist"] = Blocklist()
+        jwt = app.extensions["flask-jwt-extended"]
+        jwt.user_lookup_loader(_load_identity)
+        jwt.user_lookup_error_loader(lambda header, data: error("user not found", status=401))
+        jwt.token_in_blocklist_loader(_is_revoked)
+        jwt.revoked_token_loader(lambda header, data: error("token has been revoked", status=401))
+
+    @property
+    def _entries(self):
+        return current_app.extensions["identities"]
+
+    def get(self, user_id):
+        user_id = int(user_id)
+        cached = self._entries.get(user_id)
+        if cached is None:
+            from ..extensions import db
+            from ..models import User
+
+            user = db.session.get(User, user_id)
+            # Unknown ids are cached too, so a deleted user's token costs no queries.
+            cached = user.to_dict() if user else False
+            self._entries.set(user_id, cached, current_app.config.get("IDENTITY_CACHE_TTL", 30))
+        if not cached:
+            return None
+        return Identity(cached["id"], cached["role"], cached)
+
+    def forget(self, *user_ids):
+        self._entries.delete(*(int(user_id) for user_id in user_ids))
+
+    def clear(self):
+        self._entries.clear()
+
+    @staticmethod
+    def blocklist():
+        from ..extensions import cache
+
+        if isinstance(cache.backend, RedisBackend):
+            return SharedBlocklist(cache.backend)
+        return current_app.extensions["token_blocklist"]
+
+    def revoke(self, jwt_data):
+        ttl = jwt_data.get("exp", time.time()) - time.time()
+        if ttl > 0:
+            self.blocklist().revoke(jwt_data["jti"], ttl)
+
+
+def _load_identity(jwt_header, jwt_data):
+    from ..extensions import identities
+
+    return identities.get(jwt_data[current_app.config.get("JWT_IDENTITY_CLAIM", "sub")])
+
+
+def _is_revoked(jwt_header, jwt_data):
+    from ..extensions import identities
+
+    return identities.blocklist().is_revoked(jwt_data["jti"])
+
+
+def expire(session, user_ids):
+    """Drop the cached identities of `user_ids` when `session` commits."""
+    stale = session.info.setdefault(STALE, set())
+    if stale != ALL:
+        stale.update(int(user_id) for user_id in user_ids)
+
+
+def expire_all(session):
+    session.info[STALE] = ALL
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_users(session, flush_context, instances):
+    from ..models import User
+
+    changed = [
+        obj.id for obj in (*session.dirty, *session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    ]
+    if changed:
+        expire(session, changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_users(session):
+    from ..extensions import identities
+
+    stale = session.info.pop(STALE, None)
+    if not stale or not has_app_context():
+        return
+    if stale == ALL:
+        identities.clear()
+    else:
+        identities.forget(*stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _keep_users(session):
+    session.info.pop(STALE, None)
@@ -0,0 +1,174 @@
+import glob
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from flask import current_app
+from sqlalchemy import func
+
+from ..extensions import db, media_processor
+from ..models import Media, Post
+from .thumbnail_service import remove_result
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+logger = logging.getLogger(__name__)
+_cleaner_lock = threading.Lock()
+
+
+def digest_from_url(url):
+    """Return the blob digest for a content-addressed /uploads URL, else None."""
+    path = urlparse(url or "").path
+    if "/uploads/" not in path:
+        return None
+    stem, _ = os.path.splitext(os.path.basename(path))
+    return stem if _DIGEST.match(stem) else None
+
+
+def build_media(item):
+    """Create a Media row from a request payload item, or None if incomplete."""
+    if not isinstance(item, dict):
+        return None
+    media_type = item.get("type")
+    url = item.get("url")
+    if not media_type or not url:
+        return None
+    media = Media(
+        type=media_type,
+        url=url,
+        thumbnail_url=item.get("thumbnail_url"),
+        digest=digest_from_url(url),
+    )
+    media_processor.attach(media)
+    return media
+
+
+def refresh_pending(post):
+    """Pick up processing results that landed while the post's transaction was open.
+
+    Returns True when a row changed and the session needs another commit.
+    """
+    changed = False
+    for media in post.media_items:
+        if media.status == "pending" and media_processor.attach(media):
+            changed = True
+    if changed:
+        post.version = Post.version + 1
+    return changed
+
+
+def digests_of(posts):
+    return {media.digest for post in posts for media in post.media_items if media.digest}
+
+
+def digests_of_posts(post_ids):
+    """Like `digests_of`, straight from the media table without loading posts."""
+    return set(
+        db.session.scalars(
+            db.select(Media.digest)
+            .where(Media.post_id.in_(post_ids), Media.digest.isnot(None))
+            .distinct()
+        )
+    )
+
+
+def reference_counts(digests):
+    """Map digest -> number of Media rows pointing at it (absent means zero)."""
+    rows = db.session.execute(
+        db.select(Media.digest, func.count(Media.id))
+        .where(Media.digest.in_(set(digests)))
+        .group_by(Media.digest)
+    )
+    return dict(rows.all())
+
+
+def release(digests):
+    """Delete blobs (and derived files) no Media row references any more.
+
+    Call after the deleting transaction has committed. Blobs touched within
+    MEDIA_GC_GRACE_SECONDS are kept because a fresh upload of the same bytes
+    may be about to be attached to a new post. Returns the digests removed.
+    """
+    digests = set(digests)
+    if not digests:
+        return set()
+    referenced = reference_counts(digests)
+    upload_dir = current_app.config["UPLOAD_FOLDER"]
+    cutoff = time.time() - current_app.config.get("MEDIA_GC_GRACE_SECONDS", 3600)
+    removed = set()
+    for digest in digests - set(referenced):
+        for path in glob.glob(os.path.join(upload_dir, f"{digest}*")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+                    removed.add(digest)
+            except OSError:
+                continue
+        if digest in removed:
+            # Otherwise a re-upload of the same bytes would find a stale result.
+            remove_result(upload_dir, digest)
+    return removed
+
+
+def sweep(chunk=500):
+    """Release every content-addressed blob in the upload folder no Media row uses.
+
+    `release` only sees digests from the delete paths, and skips blobs still
+    inside the grace period. A post deleted soon after its upload leaves such
+    a blob behind. This finds them by filename, in chunks of `chunk` digests
+    per reference query. Returns the digests removed.
+    """
+    upload_dir = current_app.config["UPLOAD_FOLDER"]
+    try:
+        names = os.listdir(upload_dir)
+    except OSError:
+        return set()
+    # Blobs are "<digest>.<ext>"; derived files are "<digest>_<variant>...".
+    digests = sorted({name[:64] for name in names if _DIGEST.match(name[:64])})
+    removed = set()
+    for start in range(0, len(digests), chunk):
+        removed |= release(digests[start:start + chunk])
+    return removed
+
+
+def release_later(digests):
+    """Run `release` on the app's background cleanup thread.
+
+    Bulk deletes can free thousands of blobs; unlinking them does not have
+    to hold up the response. With MEDIA_PROCESSING=sync (tests) it runs inline.
+    """
+    digests = set(digests)
+    if not digests:
+        return
+    if media_processor.mode == "sync":
+        release(digests)
+        return
+    app = current_app._get_current_object()
+    with _cleaner_lock:
+        cleaner = app.extensions.get("media_cleaner")
+        if cleaner is None:
+            # One thread, created after fork: deletions are disk-bound anyway.
+            cleaner = app.extensions["media_cleaner"] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="media-cleaner"
+            )
+    cleaner.submit(_release_in_background, app, digests)
+
+
+def _release_in_background(app, digests):
+    with app.app_context():
+        try:
+            release(digests)
+        except Exception:
+            logger.exception("media cleanup failed for %d blobs", len(digests))
+
+
+def shutdown_cleaner(app):
+    """Finish queued cleanups (called when a worker exits)."""
+    with _cleaner_lock:
+        cleaner = app.extensions.pop("media_cleaner", None)
+    if cleaner is not None:
+        cleaner.shutdown(wait=True)
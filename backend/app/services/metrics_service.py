@@ -0,0 +1,209 @@
+"""Opt-in request profiling and query instrumentation.
+
+With ``INSTRUMENTATION_ENABLED`` every request records its wall time, the
+number of SQL statements it ran and their total time (from engine cursor
+events), and answers with a ``Server-Timing`` header. Statements slower
+than ``SLOW_QUERY_MS`` are logged with their parameter *shapes* (types, not
+values), and requests issuing more than ``QUERY_COUNT_WARN`` statements are
+logged too, which is how N+1 loops show up. Per-blueprint histograms are
+exposed in Prometheus text format at ``METRICS_PATH``; when
+``METRICS_TOKEN`` is set the scraper must send it as a bearer token.
+
+Metrics live in process memory: with several workers each one reports its
+own counters, so scrape them per worker or aggregate in Prometheus.
+"""
+import bisect
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..utils.response import error
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class Registry:
+    """Thread-safe per-process metric store."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.durations = {}
+        self.query_counts = {}
+        self.query_seconds = {}
+        self.slow_queries = 0
+
+    def record(self, blueprint, method, status, seconds, queries, query_seconds):
+        with self._lock:
+            key = (blueprint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.durations.setdefault(blueprint, Histogram(DURATION_BUCKETS)).observe(seconds)
+            self.query_counts.setdefault(blueprint, Histogram(QUERY_BUCKETS)).observe(queries)
+            self.query_seconds[blueprint] = self.query_seconds.get(blueprint, 0.0) + query_seconds
+
+    def slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self):
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests handled, by blueprint, method and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (blueprint, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'http_requests_total{{blueprint="{blueprint}",method="{method}",'
+                    f'status="{status}"}} {count}'
+                )
+            lines += [
+                "# HELP http_request_duration_seconds Request wall time.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for blueprint, histogram in sorted(self.durations.items()):
+                lines += histogram.lines("http_request_duration_seconds", f'blueprint="{blueprint}"')
+            lines += [
+                "# HELP db_queries_per_request SQL statements executed per request.",
+                "# TYPE db_queries_per_request histogram",
+            ]
+            for blueprint, histogram in sorted(self.query_counts.items()):
+                lines += histogram.lines("db_queries_per_request", f'blueprint="{blueprint}"')
+            lines += [
+                "# HELP db_query_seconds_total Time spent in SQL statements.",
+                "# TYPE db_query_seconds_total counter",
+            ]
+            for blueprint, seconds in sorted(self.query_seconds.items()):
+                lines.append(f'db_query_seconds_total{{blueprint="{blueprint}"}} {seconds:.6f}')
+            lines += [
+                "# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS.",
+                "# TYPE db_slow_queries_total counter",
+                f"db_slow_queries_total {self.slow_queries}",
+            ]
+            return "\n".join(lines) + "\n"
+
+
+def parameter_shape(parameters, executemany=False):
+    """Describe bound parameters by type so logs never carry user data."""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {parameter_shape(rows[0]) if rows else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _active():
+    return has_app_context() and "instrumentation" in current_app.extensions
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if _active():
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started or not _active():
+        return
+    elapsed = time.perf_counter() - started.pop()
+    if has_request_context() and "query_count" in g:
+        g.query_count += 1
+        g.query_seconds += elapsed
+    threshold = current_app.config.get("SLOW_QUERY_MS", 200)
+    if elapsed * 1000 >= threshold:
+        current_app.extensions["instrumentation"].slow_query()
+        logger.warning(
+            "slow query %.1fms: %s | params %s",
+            elapsed * 1000,
+            " ".join(statement.split()),
+            parameter_shape(parameters, executemany),
+        )
+
+
+class Instrumentation:
+    """Flask extension wiring the request hooks and the metrics endpoint."""
+
+    def init_app(self, app):
+        if not app.config.get("INSTRUMENTATION_ENABLED"):
+            return
+        app.extensions["instrumentation"] = Registry()
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(
+            app.config.get("METRICS_PATH", "/metrics"), "metrics", self._metrics, methods=["GET"]
+        )
+
+    @staticmethod
+    def _before_request():
+        g.request_started = time.perf_counter()
+        g.query_count = 0
+        g.query_seconds = 0.0
+
+    @staticmethod
+    def _after_request(response):
+        if "request_started" not in g or request.endpoint == "metrics":
+            return response
+        elapsed = time.perf_counter() - g.request_started
+        blueprint = request.blueprint or "app"
+        current_app.extensions["instrumentation"].record(
+            blueprint,
+            request.method,
+            response.status_code,
+            elapsed,
+            g.query_count,
+            g.query_seconds,
+        )
+        response.headers["Server-Timing"] = (
+            f'db;dur={g.query_seconds * 1000:.1f};desc="{g.query_count} queries", '
+            f"total;dur={elapsed * 1000:.1f}"
+        )
+        warn_at = current_app.config.get("QUERY_COUNT_WARN", 20)
+        if warn_at and g.query_count > warn_at:
+            logger.warning(
+                "%s %s ran %d queries (%.1fms in SQL)",
+                request.method,
+                request.path,
+                g.query_count,
+                g.query_seconds * 1000,
+            )
+        return response
+
+    @staticmethod
+    def _metrics():
+        token = current_app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return error("unauthorized", 401)
+        body = current_app.extensions["instrumentation"].render()
+        return current_app.response_class(body, mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,142 @@
+"""Password hashing with a configurable algorithm and a bounded hashing pool.
+
+``PASSWORD_HASHER`` selects the algorithm for new hashes:
+
+- "scrypt" (the default) uses werkzeug's scrypt with ``PASSWORD_SCRYPT_N``,
+  ``PASSWORD_SCRYPT_R`` and ``PASSWORD_SCRYPT_P``.
+- "argon2" uses argon2id (needs the argon2-cffi package) with
+  ``PASSWORD_ARGON2_TIME_COST``, ``PASSWORD_ARGON2_MEMORY_KIB`` and
+  ``PASSWORD_ARGON2_PARALLELISM``.
+- "pbkdf2" keeps werkzeug's pbkdf2:sha256 with ``PASSWORD_PBKDF2_ITERATIONS``.
+
+Stored hashes record their own algorithm and parameters, so every existing
+hash still verifies. ``needs_rehash`` reports hashes made with other settings,
+and login replaces them. Changing the cost therefore migrates users as they
+sign in.
+
+Hashing is CPU- and, for scrypt/argon2, memory-heavy, and it releases the GIL.
+It runs on ``PASSWORD_HASH_THREADS`` threads per process. At most
+``PASSWORD_HASH_QUEUE`` further calls may wait for one. Beyond that,
+``HasherBusy`` is raised and the request gets a 503 instead of piling up
+behind a login storm.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+ARGON2_PREFIX = "$argon2"
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool and its queue are full."""
+
+
+def _argon2(config):
+    try:
+        from argon2 import PasswordHasher as Argon2Hasher
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("PASSWORD_HASHER=argon2 requires the argon2-cffi package") from exc
+    return Argon2Hasher(
+        time_cost=config.get("PASSWORD_ARGON2_TIME_COST", 2),
+        memory_cost=config.get("PASSWORD_ARGON2_MEMORY_KIB", 19456),
+        parallelism=config.get("PASSWORD_ARGON2_PARALLELISM", 1),
+    )
+
+
+def werkzeug_method(config):
+    """The werkzeug method string for the configured algorithm, e.g. "scrypt:32768:8:1"."""
+    if config.get("PASSWORD_HASHER", "scrypt") == "pbkdf2":
+        return f"pbkdf2:sha256:{config.get('PASSWORD_PBKDF2_ITERATIONS', 1000000)}"
+    return (
+        f"scrypt:{config.get('PASSWORD_SCRYPT_N', 32768)}"
+        f":{config.get('PASSWORD_SCRYPT_R', 8)}:{config.get('PASSWORD_SCRYPT_P', 1)}"
+    )
+
+
+class PasswordHasher:
+    """Flask extension hashing and verifying passwords on the bounded pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        config = app.config
+        argon2 = _argon2(config) if config.get("PASSWORD_HASHER") == "argon2" else None
+        app.extensions["passwords"] = {
+            "argon2": argon2,
+            "method": None if argon2 else werkzeug_method(config),
+            # Verified against when the username does not exist, so a miss costs
+            # as much as a wrong password and does not reveal which names exist.
+            "dummy": None,
+            # Created on first use, so preloaded gunicorn masters fork without threads.
+            "executor": None,
+            "slots": None,
+        }
+
+    @property
+    def _settings(self):
+        return current_app.extensions["passwords"]
+
+    def _submit(self, fn, *args):
+        settings = self._settings
+        with self._lock:
+            if settings["executor"] is None:
+                threads = current_app.config.get("PASSWORD_HASH_THREADS", 4)
+                queue = current_app.config.get("PASSWORD_HASH_QUEUE", 32)
+                settings["executor"] = ThreadPoolExecutor(
+                    max_workers=threads, thread_name_prefix="password"
+                )
+                settings["slots"] = threading.BoundedSemaphore(threads + queue)
+        slots = settings["slots"]
+        if not slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = settings["executor"].submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future.result()
+
+    def hash(self, password):
+        argon2 = self._settings["argon2"]
+        if argon2 is not None:
+            return self._submit(argon2.hash, password)
+        return self._submit(generate_password_hash, password, self._settings["method"])
+
+    def verify(self, stored, password):
+        if stored.startswith(ARGON2_PREFIX):
+            return self._submit(_verify_argon2, self._settings["argon2"], stored, password)
+        return self._submit(check_password_hash, stored, password)
+
+    def verify_dummy(self, password):
+        settings = self._settings
+        if settings["dummy"] is None:
+            settings["dummy"] = self.hash("dummy password")
+        self.verify(settings["dummy"], password)
+        return False
+
+    def needs_rehash(self, stored):
+        argon2 = self._settings["argon2"]
+        if argon2 is not None:
+            return not stored.startswith(ARGON2_PREFIX) or argon2.check_needs_rehash(stored)
+        return stored.split("$", 1)[0] != self._settings["method"]
+
+    def shutdown(self, app):
+        settings = app.extensions["passwords"]
+        with self._lock:
+            if settings["executor"] is not None:
+                settings["executor"].shutdown(wait=False, cancel_futures=True)
+                settings["executor"] = None
+
+
+def _verify_argon2(argon2, stored, password):
+    from argon2 import PasswordHasher as Argon2Hasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+
+    try:
+        return (argon2 or Argon2Hasher()).verify(stored, password)
+    except (VerificationError, InvalidHashError):
+        return False
@@ -0,0 +1,83 @@
+"""In-memory sliding-window rate limiting.
+
+Each key keeps the timestamps of its last ``limit`` accepted attempts. An
+attempt is allowed while fewer than ``limit`` of them fall inside the window.
+Unlike fixed windows, this leaves no boundary at which a client can fire
+twice the limit. A rejected attempt is not recorded, so ``Retry-After`` is
+exact: the time until the oldest recorded attempt leaves the window.
+
+Keys live in a bounded LRU (``RATE_LIMIT_MAX_KEYS``). State is per process,
+so with N workers a client can get up to N times the limit through. Set the
+limits with that in mind. Client addresses come from ``request.remote_addr``,
+so behind a reverse proxy the app must be wrapped in werkzeug's ProxyFix.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from flask import current_app
+
+
+class SlidingWindow:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recent(self, key, limit, now, window):
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+        if hits.maxlen != limit:
+            hits = deque(hits, maxlen=limit)
+            self._hits[key] = hits
+        return hits
+
+    def hit(self, rules, window):
+        """Record one attempt against every ``(key, limit)`` rule, or none of them.
+
+        Returns 0 when the attempt is allowed, otherwise the seconds until
+        it would be. Rules with a limit of 0 are ignored.
+        """
+        now = time.monotonic()
+        rules = [(key, limit) for key, limit in rules if limit > 0]
+        with self._lock:
+            wait = 0.0
+            for key, limit in rules:
+                hits = self._recent(key, limit, now, window)
+                if hits is not None and len(hits) >= limit:
+                    wait = max(wait, hits[0] + window - now)
+            if wait:
+                return wait
+            for key, limit in rules:
+                hits = self._recent(key, limit, now, window)
+                if hits is None:
+                    hits = self._hits[key] = deque(maxlen=limit)
+                hits.append(now)
+                self._hits.move_to_end(key)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        return 0
+
+    def clear(self):
+        with self._lock:
+            self._hits.clear()
+
+
+class RateLimiter:
+    """Flask extension holding the per-app sliding window."""
+
+    def init_app(self, app):
+        app.extensions["rate_limits"] = SlidingWindow(app.config.get("RATE_LIMIT_MAX_KEYS", 100000))
+
+    @property
+    def window(self):
+        return current_app.extensions["rate_limits"]
+
+    def retry_after(self, rules, window):
+        """Whole seconds the caller must wait, or 0 if the attempt is allowed and recorded."""
+        wait = self.window.hit(rules, window)
+        return max(1, math.ceil(wait)) if wait else 0
@@ -0,0 +1,129 @@
+"""Read-replica routing.
+
+``DATABASE_REPLICA_URLS`` (comma-separated) adds one bind per replica
+(``replica0``, ``replica1``, ...). Views wrapped in ``read_only`` run their
+SELECTs on a replica picked at random per request. Flushes, SELECT ... FOR
+UPDATE, raw SQL and every view without the decorator stay on the primary.
+With no replicas configured the decorator does nothing.
+
+Read-your-writes: when a request writes, the writer's user id is marked for
+``REPLICA_STICKY_SECONDS`` in the cache backend, which is shared across
+workers when it is redis. Until the mark expires, ``read_only`` views serve
+that user from the primary. Keep replica lag well under that window. Other
+readers can still see a lagging replica, and an anonymous read can put a
+lagging entry in the response cache for up to ``CACHE_DEFAULT_TTL``.
+"""
+import random
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..utils.auth import current_viewer
+from .cache_service import MemoryBackend, NullBackend
+from .engine_service import engine_options
+
+PREFIX = "replica"
+# Process-local sticky marks kept when CACHE_BACKEND=null.
+STICKY_ENTRIES = 100000
+
+
+def replica_binds(config):
+    """SQLALCHEMY_BINDS entries for the configured replicas."""
+    return {
+        f"{PREFIX}{index}": {"url": url, **engine_options(url, config)}
+        for index, url in enumerate(config.get("DATABASE_REPLICA_URLS") or ())
+    }
+
+
+def _plain_select(clause):
+    return (
+        clause is not None
+        and getattr(clause, "is_select", False)
+        and getattr(clause, "_for_update_arg", None) is None
+    )
+
+
+class RoutingSession(FlaskSession):
+    """Session sending plain SELECTs to the replica chosen for the request."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        key = g.get("replica_bind") if has_app_context() else None
+        if key and bind is None and not self._flushing and _plain_select(clause):
+            return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Flask extension holding the replica bind keys and the sticky marks."""
+
+    def init_app(self, app):
+        keys = sorted(replica_binds(app.config))
+        app.extensions["replicas"] = keys
+        if keys:
+            app.after_request(self._mark_writer)
+
+    @staticmethod
+    def _store():
+        from ..extensions import cache
+
+        backend = cache.backend
+        if isinstance(backend, NullBackend):
+            # Stickiness must not depend on response caching being enabled.
+            backend = current_app.extensions.setdefault(
+                "replica_sticky", MemoryBackend(STICKY_ENTRIES)
+            )
+        return backend
+
+    @staticmethod
+    def _mark_writer(response):
+        if not g.get("db_wrote"):
+            return response
+        try:
+            user_id = get_jwt_identity()
+        except RuntimeError:
+            user_id = None
+        if user_id is not None:
+            ReplicaRouter._store().set(
+                f"sticky:{user_id}", 1, current_app.config.get("REPLICA_STICKY_SECONDS", 5)
+            )
+        return response
+
+    def choose(self):
+        """Bind key for this request's reads, or None for the primary."""
+        keys = current_app.extensions.get("replicas")
+        if not keys:
+            return None
+        user_id, _ = current_viewer()
+        if user_id is not None and self._store().get(f"sticky:{user_id}"):
+            return None
+        return random.choice(keys)
+
+
+def read_only(view):
+    """Route the view's SELECTs to a replica (see module docstring)."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from ..extensions import replicas
+
+        g.replica_bind = replicas.choose()
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flush(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement(orm_execute_state):
+    # Bulk UPDATE/DELETE/INSERT statements write without flushing.
+    if has_request_context() and not orm_execute_state.is_select:
+        g.db_wrote = True
@@ -0,0 +1,199 @@
+"""Full-text search over post content and tag names.
+
+SQLite uses an FTS5 table (``posts_fts``, trigram tokenizer so CJK text and
+substrings still match) and PostgreSQL a ``post_search`` tsvector table with a
+GIN index. Both are created by migration 7a1e5d3c9b20 and kept in sync from
+the ORM flush, so every code path that writes posts through the session is
+covered. When neither table exists (e.g. a fresh ``create_all`` database)
+keyword search falls back to ``ILIKE``.
+"""
+from sqlalchemy import column, event, func, inspect, literal_column, or_, table, text
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import Post, Tag
+from .tag_service import normalize
+
+SQLITE_TABLE = "posts_fts"
+POSTGRES_TABLE = "post_search"
+# Trigram FTS cannot match terms shorter than three characters.
+MIN_TRIGRAM = 3
+
+posts_fts = table(SQLITE_TABLE, column("rowid"), column("content"), column("tags"))
+post_search = table(POSTGRES_TABLE, column("post_id"), column("document"))
+
+_available = {}
+
+
+def backend(bind=None):
+    """Return "sqlite", "postgresql" or None when no search table exists.
+
+    Pass the flush connection when called mid-transaction so the probe does
+    not check out (and later roll back) a second connection.
+    """
+    bind = bind or db.engine
+    key = bind.engine.url.render_as_string()
+    if key not in _available:
+        dialect = bind.dialect.name
+        name = {"sqlite": SQLITE_TABLE, "postgresql": POSTGRES_TABLE}.get(dialect)
+        found = name is not None and inspect(bind).has_table(name)
+        _available[key] = dialect if found else None
+    return _available[key]
+
+
+def reset_backend_cache():
+    _available.clear()
+
+
+def _split(keyword):
+    """Split a keyword string into (#hashtag names, plain terms)."""
+    hashtags, terms = [], []
+    for word in keyword.split():
+        name = word.lstrip("#")
+        if not name:
+            continue
+        if word.startswith("#"):
+            hashtags.append(normalize(name))
+        else:
+            terms.append(name)
+    return hashtags, terms
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def filter_posts(query, keyword):
+    """Restrict a Post query to keyword matches.
+
+    Plain words are matched against content and tag names (tag hits rank
+    higher); ``#word`` requires the post to carry that exact tag.
+
+    Returns (query, rank); rank is an ORDER BY expression (best match first)
+    or None when the fallback path is used.
+    """
+    hashtags, terms = _split(keyword)
+    for name in hashtags:
+        query = query.filter(Post.tags.any(Tag.name == name))
+    if not terms:
+        return query, None
+
+    engine = backend()
+    if engine == "sqlite":
+        query = query.join(posts_fts, posts_fts.c.rowid == Post.id)
+        long_terms = [term for term in terms if len(term) >= MIN_TRIGRAM]
+        short_terms = [term for term in terms if len(term) < MIN_TRIGRAM]
+        if long_terms:
+            match = " AND ".join(map(_quote, long_terms))
+            query = query.filter(literal_column(SQLITE_TABLE).op("MATCH")(match))
+        for term in short_terms:
+            pattern = f"%{term}%"
+            query = query.filter(
+                or_(posts_fts.c.content.like(pattern), posts_fts.c.tags.like(pattern))
+            )
+        if not long_terms:
+            return query, None
+        # bm25 is "lower is better"; tag hits weigh double.
+        return query, func.bm25(literal_column(SQLITE_TABLE), 1.0, 2.0).asc()
+
+    if engine == "postgresql":
+        tsquery = func.plainto_tsquery("simple", " ".join(terms))
+        document = post_search.c.document
+        query = query.join(post_search, post_search.c.post_id == Post.id).filter(
+            document.op("@@")(tsquery)
+        )
+        return query, func.ts_rank(document, tsquery).desc()
+
+    return query.filter(Post.content.ilike(f"%{' '.join(terms)}%")), None
+
+
+def _document(post):
+    return post.content or "", " ".join(tag.name for tag in post.tags)
+
+
+def _write(connection, engine, post_id, content, tags):
+    if engine == "sqlite":
+        connection.execute(
+            text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :id"), {"id": post_id}
+        )
+        connection.execute(
+            text(f"INSERT INTO {SQLITE_TABLE} (rowid, content, tags) VALUES (:id, :content, :tags)"),
+            {"id": post_id, "content": content, "tags": tags},
+        )
+    else:
+        connection.execute(
+            text(
+                f"INSERT INTO {POSTGRES_TABLE} (post_id, document) VALUES (:id, "
+                "setweight(to_tsvector('simple', :tags), 'A') || "
+                "setweight(to_tsvector('simple', :content), 'B')) "
+                "ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            {"id": post_id, "content": content, "tags": tags},
+        )
+
+
+def _remove(connection, engine, post_id):
+    name, key = (SQLITE_TABLE, "rowid") if engine == "sqlite" else (POSTGRES_TABLE, "post_id")
+    connection.execute(text(f"DELETE FROM {name} WHERE {key} = :id"), {"id": post_id})
+
+
+def remove_posts(post_ids):
+    """Drop posts from the index before a bulk DELETE, which the flush listener never sees."""
+    connection = db.session.connection()
+    engine = backend(connection)
+    if not engine or not post_ids:
+        return
+    if engine == "sqlite":
+        connection.execute(posts_fts.delete().where(posts_fts.c.rowid.in_(post_ids)))
+    else:
+        connection.execute(post_search.delete().where(post_search.c.post_id.in_(post_ids)))
+
+
+def rebuild():
+    """Re-index every post; returns the number of posts indexed."""
+    engine = backend()
+    if not engine:
+        return 0
+    connection = db.session.connection()
+    name = SQLITE_TABLE if engine == "sqlite" else POSTGRES_TABLE
+    connection.execute(text(f"DELETE FROM {name}"))
+    count = 0
+    for post in Post.query.options(*Post.listing_options()).yield_per(1000):
+        _write(connection, engine, post.id, *_document(post))
+        count += 1
+    db.session.commit()
+    return count
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session, flush_context, instances):
+    changed = [
+        (obj, _document(obj))
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, Post) and obj not in session.deleted
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Post)]
+    if changed or deleted:
+        pending = session.info.setdefault("search_pending", {"changed": [], "deleted": []})
+        pending["changed"].extend(changed)
+        pending["deleted"].extend(deleted)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_changes(session, flush_context):
+    pending = session.info.pop("search_pending", None)
+    if not pending:
+        return
+    connection = session.connection()
+    engine = backend(connection)
+    if not engine:
+        return
+    deleted_ids = {post.id for post in pending["deleted"]}
+    for post_id in deleted_ids:
+        _remove(connection, engine, post_id)
+    written = set()
+    for post, document in pending["changed"]:
+        if post.id is None or post.id in deleted_ids or post.id in written:
+            continue
+        written.add(post.id)
+        _write(connection, engine, post.id, *document)
@@ -0,0 +1,137 @@
+"""Serving of uploaded files under /uploads.
+
+Content-addressed files (``<sha256>.<ext>`` and derived ``<sha256>_<variant>``
+files) never change, so they get a strong ETag and a year-long immutable
+``Cache-Control``. ``UPLOAD_SERVE_MODE`` picks who moves the bytes:
+
+- ``direct`` (default): the app answers conditional and single-range
+  requests itself and hands the open file to the WSGI server's
+  ``wsgi.file_wrapper``, which gunicorn turns into ``sendfile(2)``.
+- ``x-accel``: nginx serves ``UPLOAD_ACCEL_PREFIX + filename`` from an
+  ``internal`` location; the worker only sends headers.
+- ``x-sendfile``: Apache/lighttpd serve the absolute path.
+"""
+import mimetypes
+import os
+import re
+
+from flask import abort, current_app, request
+from werkzeug.http import http_date
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+RANGE_CHUNK = 64 * 1024
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}(_[0-9a-z]+)?$")
+# Processing records written next to blobs by older releases; internal, not media.
+_LEGACY_RESULT = re.compile(r"^[0-9a-f]{64}_media\.json$")
+
+
+def _stem(filename):
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def is_immutable(filename):
+    return "/" not in filename and bool(_CONTENT_ADDRESSED.match(_stem(filename)))
+
+
+def _validators(filename, stat):
+    if is_immutable(filename):
+        return _stem(filename), f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    max_age = current_app.config.get("UPLOAD_CACHE_MAX_AGE", 3600)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}", f"public, max-age={max_age}"
+
+
+def _not_modified(etag, mtime):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and int(mtime) <= since.timestamp()
+
+
+def _if_range_ok(etag, mtime):
+    if_range = request.if_range
+    if if_range.etag:
+        # If-Range requires a strong comparison.
+        return if_range.etag == etag
+    if if_range.date:
+        return int(mtime) == int(if_range.date.timestamp())
+    return True
+
+
+def _read_range(file, length):
+    try:
+        while length > 0:
+            chunk = file.read(min(RANGE_CHUNK, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _body(file, start, length, size):
+    if start == 0 and length == size:
+        return wrap_file(request.environ, file, RANGE_CHUNK)
+    file.seek(start)
+    if request.environ.get("SERVER_SOFTWARE", "").startswith("gunicorn"):
+        # gunicorn's wrapper sendfile()s from the current offset and stops at
+        # Content-Length, so partial responses stay zero-copy too.
+        return wrap_file(request.environ, file, RANGE_CHUNK)
+    return _read_range(file, length)
+
+
+def send_upload(upload_dir, filename):
+    """Build the response for GET/HEAD /uploads/<filename>."""
+    # Dot-prefixed entries are in-flight temp files, upload sessions and
+    # media processing records.
+    if any(part.startswith(".") for part in filename.split("/")) or _LEGACY_RESULT.match(filename):
+        abort(404)
+    path = safe_join(upload_dir, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    stat = os.stat(path)
+    etag, cache_control = _validators(filename, stat)
+
+    response = current_app.response_class(
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    )
+    response.set_etag(etag)
+    response.headers["Last-Modified"] = http_date(stat.st_mtime)
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Accept-Ranges"] = "bytes"
+
+    if _not_modified(etag, stat.st_mtime):
+        response.status_code = 304
+        return response
+
+    mode = current_app.config.get("UPLOAD_SERVE_MODE", "direct")
+    if mode == "x-accel":
+        prefix = current_app.config.get("UPLOAD_ACCEL_PREFIX", "/_uploads/")
+        response.headers["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + filename
+        return response
+    if mode == "x-sendfile":
+        response.headers["X-Sendfile"] = path
+        return response
+
+    size = stat.st_size
+    start, stop = 0, size
+    byte_range = request.range
+    if byte_range and len(byte_range.ranges) == 1 and _if_range_ok(etag, stat.st_mtime):
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            response.status_code = 416
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return response
+        start, stop = bounds
+        response.status_code = 206
+        response.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    # Multi-range requests fall through to a plain 200, which RFC 9110 allows.
+
+    response.content_length = stop - start
+    if request.method == "HEAD":
+        return response
+    response.direct_passthrough = True
+    response.response = _body(open(path, "rb"), start, stop - start, size)
+    return response
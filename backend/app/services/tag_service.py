@@ -0,0 +1,100 @@
+"""Tag name normalization and batched get-or-create.
+
+``resolve`` turns a list of tag names into Tag instances with at most one
+``IN`` lookup and one insert-or-ignore statement, so concurrent posts that
+introduce the same new tag no longer race on ``tags.name``. Ids of tags
+already committed are kept in a per-app LRU (``TAG_CACHE_SIZE``) and
+attached without touching the database at all.
+"""
+import unicodedata
+
+from flask import current_app
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..extensions import db
+from ..models import Tag
+from .cache_service import MemoryBackend
+
+MAX_LENGTH = 64
+
+
+def normalize(name):
+    """Canonical form of a tag: NFKC, no leading '#', trimmed, case-folded."""
+    if not isinstance(name, str):
+        return ""
+    name = unicodedata.normalize("NFKC", name).strip().lstrip("#").strip()
+    return name.casefold()[:MAX_LENGTH]
+
+
+def normalize_all(names):
+    """Normalize, drop empties and de-duplicate while keeping input order."""
+    return list(dict.fromkeys(filter(None, map(normalize, names))))
+
+
+def _id_cache():
+    extensions = current_app.extensions
+    if "tag_ids" not in extensions:
+        extensions["tag_ids"] = MemoryBackend(current_app.config.get("TAG_CACHE_SIZE", 4096))
+    return extensions["tag_ids"]
+
+
+def clear_cache():
+    _id_cache().clear()
+
+
+def _lookup(names):
+    rows = db.session.execute(db.select(Tag.name, Tag.id).where(Tag.name.in_(names)))
+    return dict(rows.all())
+
+
+def _insert_missing(names):
+    dialect = db.session.get_bind().dialect.name
+    rows = [{"name": name} for name in names]
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        db.session.execute(insert(Tag).values(rows).on_conflict_do_nothing(index_elements=["name"]))
+        return
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(Tag).values(row))
+        except IntegrityError:
+            pass
+
+
+def _attach(tag_id, name):
+    """Return a persistent Tag for a known id without emitting a SELECT."""
+    tag = Tag(id=tag_id, name=name)
+    make_transient_to_detached(tag)
+    return db.session.merge(tag, load=False)
+
+
+def resolve(names):
+    """Return Tag instances for `names` (normalized), creating missing ones."""
+    names = normalize_all(names)
+    if not names:
+        return []
+    cache = _id_cache()
+    ids = {}
+    for name in names:
+        tag_id = cache.get(name)
+        if tag_id is not None:
+            ids[name] = tag_id
+
+    missing = [name for name in names if name not in ids]
+    if missing:
+        found = _lookup(missing)
+        for name, tag_id in found.items():
+            # Only ids that existed before this transaction are safe to share;
+            # rows inserted below vanish if the caller rolls back.
+            cache.set(name, tag_id, None)
+        ids.update(found)
+        missing = [name for name in missing if name not in found]
+    if missing:
+        _insert_missing(missing)
+        ids.update(_lookup(missing))
+
+    return [_attach(ids[name], name) for name in names]
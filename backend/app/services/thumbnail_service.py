@@ -0,0 +1,261 @@
+"""Background thumbnail and poster-frame generation for uploaded media.
+
+Uploads are handed to a process pool right after they are stored. Derived
+files are written next to the blob as ``<digest>_<variant>.jpg`` (so blob
+garbage collection removes them too) and the result is recorded on every
+Media row sharing that digest. Images need Pillow and videos need an
+``ffmpeg`` binary; when either is missing the media is marked "skipped"
+and clients keep using the original URL.
+
+``MEDIA_PROCESSING`` selects "async" (process pool, default), "sync"
+(inline, handy for tests) or "off".
+"""
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+def variant_filename(stem, variant):
+    return f"{stem}_{variant}.jpg"
+
+
+# --- worker side: runs in pool processes, must not touch the app or the DB ---
+
+
+def _render_image(source, upload_dir, stem, sizes):
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return SKIPPED, {}
+    variants = {}
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size in sizes:
+            copy = image.copy()
+            copy.thumbnail((size, size))
+            filename = variant_filename(stem, size)
+            _save_atomic(copy, os.path.join(upload_dir, filename))
+            variants[str(size)] = filename
+    return READY, variants
+
+
+def _save_atomic(image, path):
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    image.save(temp_path, "JPEG", quality=82, optimize=True, progressive=True)
+    os.replace(temp_path, path)
+
+
+def _render_video(source, upload_dir, stem):
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return SKIPPED, {}
+    filename = variant_filename(stem, "poster")
+    temp_path = os.path.join(upload_dir, f".{filename}.tmp.jpg")
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-ss", "1", "-i", source,
+         "-frames:v", "1", "-vf", "scale='min(640,iw)':-2", temp_path],
+        check=True,
+        timeout=120,
+    )
+    if not os.path.exists(temp_path):
+        # Clips shorter than the seek offset: grab the very first frame.
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-i", source, "-frames:v", "1", temp_path],
+            check=True,
+            timeout=120,
+        )
+    os.replace(temp_path, os.path.join(upload_dir, filename))
+    return READY, {"poster": filename}
+
+
+def render(upload_dir, filename, kind, sizes):
+    """Generate derived files for one upload; returns (status, {variant: filename})."""
+    source = os.path.join(upload_dir, filename)
+    stem, _ = os.path.splitext(filename)
+    try:
+        if kind == "video":
+            return _render_video(source, upload_dir, stem)
+        return _render_image(source, upload_dir, stem, sizes)
+    except Exception:  # noqa: BLE001 - a bad upload must not kill the worker
+        logger.exception("media processing failed for %s", filename)
+        return FAILED, {}
+
+
+# --- app side ---
+
+
+# Result records are internal and change from pending to done, so they live in
+# a dot-prefixed directory that /uploads never serves.
+RESULTS_DIR = ".media"
+
+
+def result_path(upload_dir, filename):
+    stem, _ = os.path.splitext(filename)
+    return os.path.join(upload_dir, RESULTS_DIR, f"{stem}.json")
+
+
+def _legacy_result_path(upload_dir, filename):
+    # Older releases wrote "<digest>_media.json" next to the blob.
+    stem, _ = os.path.splitext(filename)
+    return os.path.join(upload_dir, f"{stem}_media.json")
+
+
+def read_result(upload_dir, filename):
+    """Return the recorded (status, variants) for an upload, or None if unprocessed."""
+    for path in (result_path(upload_dir, filename), _legacy_result_path(upload_dir, filename)):
+        try:
+            with open(path) as source:
+                result = json.load(source)
+        except (OSError, ValueError):
+            continue
+        return result["status"], result["variants"]
+    return None
+
+
+def remove_result(upload_dir, digest):
+    for path in (result_path(upload_dir, digest), _legacy_result_path(upload_dir, digest)):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _write_result(upload_dir, filename, status, variants):
+    path = result_path(upload_dir, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(temp_path, "w") as out:
+        json.dump({"status": status, "variants": variants}, out)
+    os.replace(temp_path, path)
+
+
+def apply_result(media, status, variants):
+    """Record a processing result on a Media row."""
+    base = media.url.rsplit("/", 1)[0]
+    urls = {name: f"{base}/{filename}" for name, filename in variants.items()}
+    media.status = status
+    media.variants = json.dumps(urls) if urls else None
+    if urls:
+        media.thumbnail_url = urls.get("poster") or urls[min(urls, key=int)]
+
+
+class MediaProcessor:
+    """Owns the worker pool and writes results back to Media rows.
+
+    Each finished upload gets a ``.media/<digest>.json`` result file before
+    any row is updated, so a post created while processing is still running
+    either sees the result file or is updated by the completion callback.
+    """
+
+    def __init__(self):
+        self._executor = None
+
+    def init_app(self, app):
+        app.extensions["media_processor"] = self
+
+    @property
+    def mode(self):
+        return current_app.config.get("MEDIA_PROCESSING", "async")
+
+    @property
+    def upload_dir(self):
+        return current_app.config["UPLOAD_FOLDER"]
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: forking a threaded server process can deadlock on inherited locks.
+            self._executor = ProcessPoolExecutor(
+                max_workers=current_app.config.get("MEDIA_WORKERS", 2),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, filename, kind):
+        """Queue derived-file generation for a stored upload; returns its status."""
+        if self.mode == "off":
+            return SKIPPED
+        result = read_result(self.upload_dir, filename)
+        if result:
+            return result[0]
+        sizes = tuple(current_app.config.get("THUMBNAIL_SIZES", (320, 640)))
+        args = (self.upload_dir, filename, kind, sizes)
+        if self.mode == "sync":
+            status, variants = render(*args)
+            self._record(filename, status, variants)
+            return status
+        app = current_app._get_current_object()
+        try:
+            future = self._pool().submit(render, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge image); start a fresh pool.
+            self._executor = None
+            future = self._pool().submit(render, *args)
+        future.add_done_callback(lambda done: self._on_done(app, filename, done))
+        return PENDING
+
+    def _on_done(self, app, filename, future):
+        try:
+            status, variants = future.result()
+        except Exception:  # noqa: BLE001 - e.g. the worker process died
+            logger.exception("media processing crashed for %s", filename)
+            status, variants = FAILED, {}
+        with app.app_context():
+            self._record(filename, status, variants)
+
+    def _record(self, filename, status, variants):
+        from ..extensions import db
+        from ..models import Media, Post
+        from ..utils.post_cache import invalidate_posts
+        from .media_service import digest_from_url
+
+        _write_result(self.upload_dir, filename, status, variants)
+        digest = digest_from_url(f"/uploads/{filename}")
+        if not digest:
+            return
+        rows = Media.query.filter_by(digest=digest).all()
+        for media in rows:
+            apply_result(media, status, variants)
+        post_ids = {media.post_id for media in rows}
+        if post_ids:
+            # New thumbnails change the post payload, so move its ETag on.
+            db.session.execute(
+                db.update(Post)
+                .where(Post.id.in_(post_ids))
+                .values(version=Post.version + 1, updated_at=Post.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+        if post_ids:
+            invalidate_posts(*post_ids)
+
+    def attach(self, media):
+        """Set status/variants on a new or pending Media row; True if it changed."""
+        if not media.digest or self.mode == "off":
+            return False
+        result = read_result(self.upload_dir, media.url.rsplit("/", 1)[-1])
+        if result:
+            apply_result(media, *result)
+            return True
+        if media.status != PENDING:
+            media.status = PENDING
+            return True
+        return False
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
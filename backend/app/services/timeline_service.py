@@ -0,0 +1,198 @@
+"""Home timelines: fan-out-on-write with a fan-out-on-read fallback.
+
+Creating a post inserts one ``timeline_entries`` row per recipient (the
+author plus accepted friends) in a single INSERT ... SELECT, and trims each
+recipient's list to ``TIMELINE_MAX_ENTRIES``. Authors with more than
+``TIMELINE_FANOUT_LIMIT`` friends are not fanned out; readers pull their
+recent posts through ``ix_posts_user_id_created_at`` and merge them in. A
+page read is therefore one index range scan on the reader's own entries,
+plus one small query when they follow such authors.
+
+Private posts only reach the author's timeline, and visibility is checked
+again on read so later edits are honoured.
+"""
+from flask import current_app
+from sqlalchemy import and_, event, literal, or_, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+
+from ..extensions import db
+from ..models import Post, TimelineEntry, User
+from ..utils.pagination import before, decode_cursor, encode_cursor
+from . import friend_service
+
+COLUMNS = ["user_id", "post_id", "created_at"]
+
+
+def _max_entries():
+    return current_app.config.get("TIMELINE_MAX_ENTRIES", 800)
+
+
+def _fanout_limit():
+    return current_app.config.get("TIMELINE_FANOUT_LIMIT", 1000)
+
+
+def _insert_ignore(source):
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        # SQLite cannot parse INSERT ... SELECT ... ON CONFLICT unless the
+        # SELECT has a WHERE clause of its own.
+        source = source.where(text("1 = 1"))
+        statement = insert(TimelineEntry).from_select(COLUMNS, source).on_conflict_do_nothing()
+    else:
+        existing = select(TimelineEntry.post_id).where(
+            TimelineEntry.user_id == source.selected_columns[0],
+            TimelineEntry.post_id == source.selected_columns[1],
+        )
+        statement = db.insert(TimelineEntry).from_select(
+            COLUMNS, source.where(~existing.exists())
+        )
+    db.session.execute(statement)
+
+
+def _trim(user_ids):
+    """Keep only the newest TIMELINE_MAX_ENTRIES rows for each user."""
+    newer = aliased(TimelineEntry)
+    keep = (
+        select(newer.post_id)
+        .where(newer.user_id == TimelineEntry.user_id)
+        .order_by(newer.created_at.desc(), newer.post_id.desc())
+        .limit(_max_entries())
+        .correlate(TimelineEntry)
+    )
+    db.session.execute(
+        db.delete(TimelineEntry)
+        .where(TimelineEntry.user_id.in_(user_ids), TimelineEntry.post_id.not_in(keep))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def is_broadcaster(user):
+    return user.friend_count > _fanout_limit()
+
+
+def fan_out(post):
+    """Push a flushed post into its author's and friends' timelines."""
+    author = db.session.get(User, post.user_id)
+    selects = [select(literal(author.id).label("id"))]
+    if post.visibility != "private" and not is_broadcaster(author):
+        # Flat UNION ALL: SQLite rejects a parenthesized compound inside one.
+        selects += friend_service.friend_id_selects(author.id)
+    recipients = union_all(*selects).subquery()
+    _insert_ignore(
+        select(recipients.c.id, Post.id, Post.created_at)
+        .select_from(recipients)
+        .join(Post, Post.id == post.id)
+    )
+    _trim(select(recipients.c.id))
+
+
+def backfill(user_id, author_id, limit=50):
+    """Copy an author's recent visible posts into a new friend's timeline."""
+    author = db.session.get(User, author_id)
+    if author is None or is_broadcaster(author):
+        return
+    recent = (
+        select(Post.id, Post.created_at)
+        .where(Post.user_id == author_id, Post.visibility != "private")
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+    _insert_ignore(select(literal(user_id), recent.c.id, recent.c.created_at))
+    _trim([user_id])
+
+
+def unlink(user_id, author_id):
+    """Remove an ex-friend's posts from a user's timeline."""
+    db.session.execute(
+        db.delete(TimelineEntry)
+        .where(
+            TimelineEntry.user_id == user_id,
+            TimelineEntry.post_id.in_(select(Post.id).where(Post.user_id == author_id)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild(user_id):
+    """Recompute one user's timeline from scratch (e.g. after migrating)."""
+    db.session.execute(db.delete(TimelineEntry).where(TimelineEntry.user_id == user_id))
+    friends = friend_service.friend_ids(user_id).subquery()
+    pushing = select(User.id).where(
+        User.id.in_(select(friends.c.id)), User.friend_count <= _fanout_limit()
+    )
+    recent = (
+        select(Post.id, Post.created_at)
+        .where(
+            or_(
+                Post.user_id == user_id,
+                and_(Post.user_id.in_(pushing), Post.visibility != "private"),
+            )
+        )
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(_max_entries())
+        .subquery()
+    )
+    _insert_ignore(select(literal(user_id), recent.c.id, recent.c.created_at))
+
+
+def home(user_id, cursor=None, per_page=10):
+    """Return (posts, next_cursor) for a user's home timeline."""
+    position = decode_cursor(cursor)
+    visible = or_(Post.user_id == user_id, Post.visibility != "private")
+
+    pushed = (
+        Post.query.options(*Post.listing_options())
+        .join(
+            TimelineEntry,
+            and_(TimelineEntry.post_id == Post.id, TimelineEntry.user_id == user_id),
+        )
+        .filter(visible)
+    )
+    if position:
+        pushed = pushed.filter(
+            before(db.session, TimelineEntry.created_at, TimelineEntry.post_id, position)
+        )
+    posts = (
+        pushed.order_by(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc())
+        .limit(per_page + 1)
+        .all()
+    )
+
+    friends = friend_service.friend_ids(user_id).subquery()
+    broadcasters = select(User.id).where(
+        User.id.in_(select(friends.c.id)), User.friend_count > _fanout_limit()
+    )
+    pulled = Post.query.options(*Post.listing_options()).filter(
+        Post.user_id.in_(broadcasters), Post.visibility != "private"
+    )
+    if position:
+        pulled = pulled.filter(before(db.session, Post.created_at, Post.id, position))
+    posts += pulled.order_by(Post.created_at.desc(), Post.id.desc()).limit(per_page + 1).all()
+
+    # A user who crossed the fan-out limit can appear in both lists.
+    merged = sorted(
+        {post.id: post for post in posts}.values(),
+        key=lambda post: (post.created_at, post.id),
+        reverse=True,
+    )
+    page = merged[:per_page]
+    next_cursor = encode_cursor(page[-1]) if len(merged) > per_page else None
+    return page, next_cursor
+
+
+@event.listens_for(Session, "before_flush")
+def _drop_entries(session, flush_context, instances):
+    # Runs before the rows go so the foreign keys are never left dangling.
+    post_ids = [obj.id for obj in session.deleted if isinstance(obj, Post)]
+    user_ids = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if not post_ids and not user_ids:
+        return
+    connection = session.connection()
+    if post_ids:
+        connection.execute(db.delete(TimelineEntry).where(TimelineEntry.post_id.in_(post_ids)))
+    if user_ids:
+        connection.execute(db.delete(TimelineEntry).where(TimelineEntry.user_id.in_(user_ids)))
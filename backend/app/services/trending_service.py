@@ -0,0 +1,316 @@
+"""Trending tags from time-bucketed usage counters.
+
+``tag_usage`` holds, per tag and per ``TRENDING_BUCKET_SECONDS`` bucket, how
+many public posts created in that bucket carry the tag. Trending is shown to
+anonymous users, so friends-only and private posts are not counted. It is
+kept up to date from the ORM flush (tags attached to new posts, added/removed
+on edits, posts made public or hidden, dropped with deleted posts), so no
+request ever aggregates ``post_tags``.
+
+Each process keeps the decayed scores of every tag seen inside
+``TRENDING_WINDOW_SECONDS`` plus a sorted top-K list. Scores are stored
+relative to a reference time, so decay never has to be re-applied to every
+tag: committed changes adjust one score and the top-K in O(K log K), and a
+read is a slice of the top-K. The structure is reloaded from ``tag_usage``
+every ``TRENDING_REFRESH_SECONDS`` to pick up writes made by other workers.
+"""
+import heapq
+import threading
+import time
+from datetime import timezone
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import Post, PostTag, Tag, TagUsage
+from .visibility_service import PUBLIC
+
+
+def _settings(config):
+    return {
+        "bucket_seconds": config.get("TRENDING_BUCKET_SECONDS", 3600),
+        "window": config.get("TRENDING_WINDOW_SECONDS", 7 * 24 * 3600),
+        "half_life": config.get("TRENDING_HALF_LIFE_SECONDS", 24 * 3600),
+        "top_k": config.get("TRENDING_TOP_K", 50),
+        "refresh": config.get("TRENDING_REFRESH_SECONDS", 300),
+    }
+
+
+def bucket_of(created_at, bucket_seconds):
+    if created_at is None:
+        timestamp = time.time()
+    else:
+        timestamp = created_at.replace(tzinfo=timezone.utc).timestamp()
+    return int(timestamp // bucket_seconds)
+
+
+class TrendingTags:
+    """Per-process decayed tag scores with an incrementally kept top-K."""
+
+    def __init__(self, bucket_seconds, window, half_life, top_k, refresh):
+        self.bucket_seconds = bucket_seconds
+        self.window = window
+        self.half_life = half_life
+        self.top_k = top_k
+        self.refresh = refresh
+        self._lock = threading.Lock()
+        self._scores = {}
+        self._counts = {}
+        self._names = {}
+        self._top = []
+        self._reference = None
+        self._loaded_at = None
+
+    def first_bucket(self, now):
+        return int((now - self.window) // self.bucket_seconds) + 1
+
+    def stale(self, now):
+        return self._loaded_at is None or now - self._loaded_at >= self.refresh
+
+    def _weight(self, bucket):
+        return 2 ** ((bucket * self.bucket_seconds - self._reference) / self.half_life)
+
+    def reload(self, rows, now):
+        """Replace all state with (tag_id, name, bucket, count) rows."""
+        with self._lock:
+            self._reference = now
+            self._scores, self._counts, self._names = {}, {}, {}
+            for tag_id, name, bucket, count in rows:
+                self._names[tag_id] = name
+                self._scores[tag_id] = self._scores.get(tag_id, 0.0) + count * self._weight(bucket)
+                self._counts[tag_id] = self._counts.get(tag_id, 0) + count
+            self._top = heapq.nlargest(self.top_k, self._scores, key=self._scores.get)
+            self._loaded_at = now
+
+    def apply(self, changes, now):
+        """Fold committed (tag_id, name, bucket, delta) changes into the scores."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            first = self.first_bucket(now)
+            rescan = False
+            for tag_id, name, bucket, delta in changes:
+                if bucket < first:
+                    continue
+                self._names[tag_id] = name
+                self._scores[tag_id] = self._scores.get(tag_id, 0.0) + delta * self._weight(bucket)
+                self._counts[tag_id] = self._counts.get(tag_id, 0) + delta
+                if delta < 0 and tag_id in self._top:
+                    # A top tag lost ground; a tag outside the top may now beat it.
+                    rescan = True
+                elif tag_id not in self._top:
+                    self._top.append(tag_id)
+            source = self._scores if rescan else self._top
+            self._top = heapq.nlargest(self.top_k, source, key=self._scores.get)
+
+    def top(self, limit, now):
+        with self._lock:
+            decay = 2 ** ((self._reference - now) / self.half_life) if self._reference else 0
+            result = []
+            for tag_id in self._top[:limit]:
+                score = self._scores[tag_id] * decay
+                if score <= 0 or self._counts.get(tag_id, 0) <= 0:
+                    continue
+                result.append(
+                    {
+                        "id": tag_id,
+                        "name": self._names[tag_id],
+                        "score": round(score, 4),
+                        "count": self._counts[tag_id],
+                    }
+                )
+            return result
+
+
+def tracker():
+    extensions = current_app.extensions
+    if "trending_tags" not in extensions:
+        extensions["trending_tags"] = TrendingTags(**_settings(current_app.config))
+    return extensions["trending_tags"]
+
+
+def _usage_rows(first_bucket):
+    return db.session.execute(
+        db.select(TagUsage.tag_id, Tag.name, TagUsage.bucket, TagUsage.count)
+        .join(Tag, Tag.id == TagUsage.tag_id)
+        .where(TagUsage.bucket >= first_bucket, TagUsage.count > 0)
+    ).all()
+
+
+def trending(limit=10):
+    """Return the top `limit` tags by decayed recent usage."""
+    state = tracker()
+    now = time.time()
+    if state.stale(now):
+        state.reload(_usage_rows(state.first_bucket(now)), now)
+    return state.top(min(limit, state.top_k), now)
+
+
+def rebuild():
+    """Recount tag_usage for the trending window from post_tags."""
+    state = tracker()
+    now = time.time()
+    first = state.first_bucket(now)
+    since = first * state.bucket_seconds
+    counts = {}
+    rows = db.session.execute(
+        db.select(PostTag.tag_id, Post.created_at)
+        .join(Post, Post.id == PostTag.post_id)
+        .where(Post.visibility == PUBLIC)
+    )
+    for tag_id, created_at in rows:
+        bucket = bucket_of(created_at, state.bucket_seconds)
+        if bucket * state.bucket_seconds >= since:
+            counts[(tag_id, bucket)] = counts.get((tag_id, bucket), 0) + 1
+    db.session.execute(db.delete(TagUsage))
+    if counts:
+        db.session.execute(
+            db.insert(TagUsage),
+            [
+                {"tag_id": tag_id, "bucket": bucket, "count": count}
+                for (tag_id, bucket), count in counts.items()
+            ],
+        )
+    db.session.commit()
+    state.reload(_usage_rows(first), now)
+    return len(counts)
+
+
+def prune():
+    """Delete usage buckets that fell out of the trending window."""
+    state = tracker()
+    result = db.session.execute(
+        db.delete(TagUsage).where(TagUsage.bucket < state.first_bucket(time.time()))
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def _upsert(connection, rows):
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(TagUsage).values(rows)
+        connection.execute(
+            insert.on_conflict_do_update(
+                index_elements=["tag_id", "bucket"],
+                set_={"count": TagUsage.count + insert.excluded.count},
+            )
+        )
+        return
+    for row in rows:
+        updated = connection.execute(
+            db.update(TagUsage)
+            .where(TagUsage.tag_id == row["tag_id"], TagUsage.bucket == row["bucket"])
+            .values(count=TagUsage.count + row["count"])
+        )
+        if not updated.rowcount:
+            connection.execute(db.insert(TagUsage).values(row))
+
+
+def _is_public(visibility):
+    # New posts get the column default on insert, after this listener runs.
+    return (visibility or PUBLIC) == PUBLIC
+
+
+def _counted_tags(post):
+    """(tags counted before this flush, tags counted after it) for a persistent post."""
+    state = inspect(post).attrs
+    tags, visibility = state.tags.load_history(), state.visibility.load_history()
+    before = [*tags.unchanged, *tags.deleted] if _is_public(
+        visibility.deleted[0] if visibility.deleted else post.visibility
+    ) else []
+    after = [*tags.unchanged, *tags.added] if _is_public(post.visibility) else []
+    return before, after
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changes(session, flush_context, instances):
+    if not has_app_context():
+        return
+    bucket_seconds = current_app.config.get("TRENDING_BUCKET_SECONDS", 3600)
+    changes = []
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, Post) and _is_public(obj.visibility):
+                bucket = bucket_of(obj.created_at, bucket_seconds)
+                changes.extend((tag, bucket, 1) for tag in obj.tags)
+        for obj in session.dirty:
+            if isinstance(obj, Post) and obj not in session.deleted:
+                state = inspect(obj).attrs
+                if not (state.tags.history.has_changes() or state.visibility.history.has_changes()):
+                    continue
+                before, after = _counted_tags(obj)
+                if before != after:
+                    bucket = bucket_of(obj.created_at, bucket_seconds)
+                    changes.extend((tag, bucket, 1) for tag in after)
+                    changes.extend((tag, bucket, -1) for tag in before)
+        for obj in session.deleted:
+            if isinstance(obj, Post):
+                before, _ = _counted_tags(obj)
+                bucket = bucket_of(obj.created_at, bucket_seconds)
+                changes.extend((tag, bucket, -1) for tag in before)
+    if changes:
+        session.info.setdefault("trending_pending", []).extend(changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _write_changes(session, flush_context):
+    pending = session.info.pop("trending_pending", None)
+    if not pending:
+        return
+    totals, names = {}, {}
+    for tag, bucket, delta in pending:
+        if tag.id is None:
+            continue
+        totals[(tag.id, bucket)] = totals.get((tag.id, bucket), 0) + delta
+        names[tag.id] = tag.name
+    _record(session, totals, names)
+
+
+def _record(session, totals, names):
+    """Write {(tag_id, bucket): delta} to tag_usage and queue it for the tracker."""
+    rows = [
+        {"tag_id": tag_id, "bucket": bucket, "count": delta}
+        for (tag_id, bucket), delta in totals.items()
+        if delta
+    ]
+    if not rows:
+        return
+    _upsert(session.connection(), rows)
+    session.info.setdefault("trending_committed", []).extend(
+        (row["tag_id"], names[row["tag_id"]], row["bucket"], row["count"]) for row in rows
+    )
+
+
+def discount_posts(post_ids):
+    """Take posts out of tag_usage ahead of a bulk DELETE that bypasses the flush."""
+    bucket_seconds = current_app.config.get("TRENDING_BUCKET_SECONDS", 3600)
+    rows = db.session.execute(
+        db.select(PostTag.tag_id, Tag.name, Post.created_at)
+        .join(Post, Post.id == PostTag.post_id)
+        .join(Tag, Tag.id == PostTag.tag_id)
+        .where(PostTag.post_id.in_(post_ids), Post.visibility == PUBLIC)
+    )
+    totals, names = {}, {}
+    for tag_id, name, created_at in rows:
+        key = (tag_id, bucket_of(created_at, bucket_seconds))
+        totals[key] = totals.get(key, 0) - 1
+        names[tag_id] = name
+    _record(db.session, totals, names)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    changes = session.info.pop("trending_committed", None)
+    if changes and has_app_context():
+        tracker().apply(changes, time.time())
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_changes(session):
+    session.info.pop("trending_pending", None)
+    session.info.pop("trending_committed", None)
@@ -1,14 +1,152 @@
+import hashlib
+import mimetypes
 import os
-import uuid
+import queue
+import tempfile
+import threading
+from collections import namedtuple
+
 from werkzeug.utils import secure_filename
 
+CHUNK_SIZE = 1024 * 1024
+# Chunks read off the network but not yet hashed and written (bounds memory).
+WRITE_QUEUE_DEPTH = 4
 
-def save_media(file_storage, upload_dir):
-    """Save uploaded file and return filename."""
+StoredFile = namedtuple("StoredFile", "filename sha256 size")
+
+
+class UploadError(Exception):
+    status = 400
+
+
+class UploadTooLarge(UploadError):
+    status = 413
+
+
+def media_kind(mimetype):
+    """Return "image", "video" or None for unsupported types."""
+    if mimetype and mimetype.startswith("image/"):
+        return "image"
+    if mimetype and mimetype.startswith("video/"):
+        return "video"
+    return None
+
+
+def max_bytes_for(kind, config):
+    if kind == "video":
+        return config.get("UPLOAD_MAX_VIDEO_BYTES")
+    return config.get("UPLOAD_MAX_IMAGE_BYTES")
+
+
+def extension_for(original_name, mimetype=None):
+    _, ext = os.path.splitext(secure_filename(original_name or ""))
+    if not ext and mimetype:
+        ext = mimetypes.guess_extension(mimetype) or ""
+    return ext
+
+
+class ChunkWriter:
+    """Hash and write chunks on a helper thread.
+
+    The request thread goes straight back to reading the next chunk from the
+    client while the previous one is hashed and written (both release the
+    GIL), so network and disk waits overlap instead of adding up.
+    """
+
+    def __init__(self, out, digest=None):
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_DEPTH)
+        self._error = None
+        self._thread = threading.Thread(target=self._drain, args=(out, digest), daemon=True)
+        self._thread.start()
+
+    def _drain(self, out, digest):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is None:
+                try:
+                    if digest is not None:
+                        digest.update(chunk)
+                    out.write(chunk)
+                except BaseException as exc:
+                    self._error = exc
+
+    def write(self, chunk):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(chunk)
+
+    def close(self, raise_error=True):
+        """Wait for queued chunks; re-raise a write error unless unwinding."""
+        self._queue.put(None)
+        self._thread.join()
+        if raise_error and self._error is not None:
+            raise self._error
+
+
+def store_stream(stream, upload_dir, ext="", max_bytes=None):
+    """Copy a file-like stream to upload_dir in fixed-size chunks.
+
+    The bytes go to a temp file next to the destination while a SHA-256 is
+    computed (on a ChunkWriter thread), so nothing is held in memory beyond
+    a few chunks and a completed file appears under its final name
+    atomically. Raises UploadTooLarge as soon as `max_bytes` is exceeded.
+    """
     os.makedirs(upload_dir, exist_ok=True)
-    original = secure_filename(file_storage.filename or "")
-    _, ext = os.path.splitext(original)
-    filename = f"{uuid.uuid4().hex}{ext}"
-    file_path = os.path.join(upload_dir, filename)
-    file_storage.save(file_path)
-    return filename
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=upload_dir, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            writer = ChunkWriter(out, digest)
+            try:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise UploadTooLarge(f"file exceeds {max_bytes} bytes")
+                    writer.write(chunk)
+            except BaseException:
+                writer.close(raise_error=False)
+                raise
+            writer.close()
+        return publish(temp_path, upload_dir, ext, digest.hexdigest(), size)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def publish(path, upload_dir, ext, sha256, size):
+    """Move a fully written file into upload_dir under its content address.
+
+    Files are named ``<sha256><ext>``, so identical bytes are stored once:
+    when the blob already exists the new copy is dropped and the existing
+    file's mtime is refreshed, which keeps garbage collection from reaping a
+    blob that was just handed out again.
+    """
+    filename = f"{sha256}{ext.lower()}"
+    target = os.path.join(upload_dir, filename)
+    if os.path.exists(target):
+        os.unlink(path)
+        os.utime(target)
+    else:
+        os.replace(path, target)
+    return StoredFile(filename, sha256, size)
+
+
+def save_media(file_storage, upload_dir, max_bytes=None):
+    """Save uploaded file and return filename."""
+    ext = extension_for(file_storage.filename, file_storage.mimetype)
+    return store_stream(file_storage.stream, upload_dir, ext, max_bytes).filename
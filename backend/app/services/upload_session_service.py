@@ -0,0 +1,180 @@
+"""Resumable upload sessions stored under ``<UPLOAD_FOLDER>/.sessions``.
+
+Each session is a directory holding ``meta.json`` and ``data.part``. Chunks
+are written at an explicit offset, so a retried or overlapping chunk simply
+rewrites the same bytes and whatever reached disk before a dropped
+connection is kept. The current offset is always the size of the part file.
+"""
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+from .upload_service import (
+    CHUNK_SIZE,
+    ChunkWriter,
+    UploadError,
+    UploadTooLarge,
+    extension_for,
+    hash_file,
+    max_bytes_for,
+    media_kind,
+    publish,
+)
+
+SESSIONS_DIR = ".sessions"
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class SessionNotFound(UploadError):
+    status = 404
+
+
+class OffsetMismatch(UploadError):
+    status = 409
+
+    def __init__(self, offset):
+        super().__init__(f"offset must not exceed {offset}")
+        self.offset = offset
+
+
+def _root(upload_dir):
+    return os.path.join(upload_dir, SESSIONS_DIR)
+
+
+def _session_dir(upload_dir, session_id):
+    if not _SESSION_ID.match(session_id or ""):
+        raise SessionNotFound("upload session not found")
+    return os.path.join(_root(upload_dir), session_id)
+
+
+def _paths(upload_dir, session_id):
+    directory = _session_dir(upload_dir, session_id)
+    return os.path.join(directory, "meta.json"), os.path.join(directory, "data.part")
+
+
+def create(upload_dir, config, filename, mimetype, size):
+    kind = media_kind(mimetype)
+    if not kind:
+        raise UploadError("unsupported file type")
+    max_bytes = max_bytes_for(kind, config)
+    if size < 0 or (max_bytes and size > max_bytes):
+        raise UploadTooLarge(f"file exceeds {max_bytes} bytes")
+
+    purge_expired(upload_dir)
+    session_id = uuid.uuid4().hex
+    os.makedirs(_session_dir(upload_dir, session_id))
+    meta_path, part_path = _paths(upload_dir, session_id)
+    meta = {
+        "id": session_id,
+        "filename": filename,
+        "mimetype": mimetype,
+        "type": kind,
+        "size": size,
+        "expires_at": time.time() + config.get("UPLOAD_SESSION_TTL", 86400),
+    }
+    with open(meta_path, "w") as out:
+        json.dump(meta, out)
+    open(part_path, "wb").close()
+    return status(upload_dir, session_id)
+
+
+def _load(upload_dir, session_id):
+    meta_path, part_path = _paths(upload_dir, session_id)
+    try:
+        with open(meta_path) as source:
+            meta = json.load(source)
+    except FileNotFoundError:
+        raise SessionNotFound("upload session not found") from None
+    if meta["expires_at"] < time.time():
+        discard(upload_dir, session_id)
+        raise SessionNotFound("upload session expired")
+    return meta, part_path
+
+
+def status(upload_dir, session_id):
+    meta, part_path = _load(upload_dir, session_id)
+    offset = os.path.getsize(part_path)
+    return {
+        "upload_id": meta["id"],
+        "type": meta["type"],
+        "size": meta["size"],
+        "offset": offset,
+        "complete": offset == meta["size"],
+        "chunk_size": CHUNK_SIZE,
+        "expires_at": int(meta["expires_at"]),
+    }
+
+
+def write_chunk(upload_dir, session_id, offset, stream):
+    """Write a chunk starting at `offset`; returns the new session status."""
+    meta, part_path = _load(upload_dir, session_id)
+    current = os.path.getsize(part_path)
+    if offset < 0 or offset > current:
+        raise OffsetMismatch(current)
+    remaining = meta["size"] - offset
+    with open(part_path, "r+b") as out:
+        out.seek(offset)
+        writer = ChunkWriter(out)
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if len(chunk) > remaining:
+                    raise UploadTooLarge("chunk runs past the declared size")
+                writer.write(chunk)
+                remaining -= len(chunk)
+        except BaseException:
+            writer.close(raise_error=False)
+            raise
+        writer.close()
+    return status(upload_dir, session_id)
+
+
+def complete(upload_dir, session_id):
+    """Publish the assembled file like a single-shot upload and end the session."""
+    meta, part_path = _load(upload_dir, session_id)
+    size = os.path.getsize(part_path)
+    if size != meta["size"]:
+        raise OffsetMismatch(size)
+    stored = publish(
+        part_path,
+        upload_dir,
+        extension_for(meta["filename"], meta["mimetype"]),
+        hash_file(part_path),
+        size,
+    )
+    discard(upload_dir, session_id)
+    return stored, meta["type"]
+
+
+def discard(upload_dir, session_id):
+    shutil.rmtree(_session_dir(upload_dir, session_id), ignore_errors=True)
+
+
+def purge_expired(upload_dir):
+    """Delete abandoned sessions; returns how many were removed."""
+    root = _root(upload_dir)
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    now = time.time()
+    for session_id in os.listdir(root):
+        directory = os.path.join(root, session_id)
+        try:
+            with open(os.path.join(directory, "meta.json")) as source:
+                expired = json.load(source)["expires_at"] < now
+        except (OSError, ValueError, KeyError):
+            # Unreadable metadata: only reap it once it is clearly not a
+            # session still being created.
+            try:
+                expired = os.path.getmtime(directory) < now - 3600
+            except OSError:
+                continue
+        if expired:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,40 @@
+"""Who may see which posts, as SQL predicates.
+
+``public`` posts are visible to everyone, ``friends`` posts to the author and
+their accepted friends, ``private`` posts to the author only; admins see
+everything. The predicate is a plain WHERE clause, so it composes with the
+tag/keyword/date filters and keyset pagination, and the anonymous case
+(``visibility = 'public'``) is served by ``ix_posts_visibility_created_at``.
+"""
+from sqlalchemy import and_, or_
+
+from ..models import Post
+from .friend_service import friend_ids
+
+PUBLIC = "public"
+FRIENDS = "friends"
+PRIVATE = "private"
+VISIBILITIES = (PUBLIC, FRIENDS, PRIVATE)
+
+
+def predicate(viewer_id=None, admin=False):
+    """WHERE clause selecting the posts a viewer may see; None means no limit."""
+    if admin:
+        return None
+    if viewer_id is None:
+        return Post.visibility == PUBLIC
+    return or_(
+        Post.visibility == PUBLIC,
+        Post.user_id == viewer_id,
+        and_(Post.visibility == FRIENDS, Post.user_id.in_(friend_ids(viewer_id))),
+    )
+
+
+def filter_visible(query, viewer_id=None, admin=False):
+    clause = predicate(viewer_id, admin)
+    return query if clause is None else query.filter(clause)
+
+
+def get_visible(post_id, viewer_id=None, admin=False):
+    """Load a post the viewer may see, or None (also when it is hidden)."""
+    return filter_visible(Post.query.filter(Post.id == post_id), viewer_id, admin).first()
@@ -1,6 +1,14 @@
-from flask_jwt_extended import get_jwt
+from flask_jwt_extended import get_current_user, verify_jwt_in_request
 
 
 def is_admin():
-    claims = get_jwt()
-    return claims.get("role") == "admin"
+    """Whether the token's user is an admin now; the role is read from the database, not the token."""
+    return get_current_user().is_admin
+
+
+def current_viewer():
+    """Return (user_id, is_admin) for an optional bearer token; (None, False) if absent."""
+    if not verify_jwt_in_request(optional=True):
+        return None, False
+    identity = get_current_user()
+    return identity.id, identity.is_admin
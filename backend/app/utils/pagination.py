@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import String, and_, literal, or_
+
+
+def get_pagination(args, default_per_page=10):
+    try:
+        page = int(args.get("page", 1))
+        per_page = int(args.get("per_page", default_per_page))
+    except (TypeError, ValueError):
+        return 1, default_per_page
+    return max(page, 1), max(1, min(per_page, 100))
+
+
+def wants_cursor(args):
+    """Keyset mode is selected by the presence of `cursor` (empty = first page)."""
+    return "cursor" in args
+
+
+def encode_cursor(item):
+    raw = json.dumps([item.created_at.isoformat(), item.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    """Return (created_at, id) or None for an empty/garbled cursor."""
+    if not value:
+        return None
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def created_at_bound(session, value):
+    # SQLite keeps DATETIME as text and server_default rows carry no fractional
+    # part, while the DateTime bind processor always appends microseconds.
+    # Compare against the same text shape the column actually holds.
+    if session.get_bind().dialect.name == "sqlite":
+        return literal(value.isoformat(sep=" "), String)
+    return value
+
+
+def before(session, created_at_column, id_column, position):
+    """Predicate for rows strictly after `position` in (created_at, id) DESC order."""
+    created_at, item_id = position
+    created_at = created_at_bound(session, created_at)
+    # The leading range term lets the planner seek the (created_at, id) index;
+    # the OR alone makes SQLite scan every row in front of the cursor.
+    return and_(
+        created_at_column <= created_at,
+        or_(
+            created_at_column < created_at,
+            and_(created_at_column == created_at, id_column < item_id),
+        ),
+    )
+
+
+def keyset_page(query, model, cursor, per_page):
+    """Fetch one page ordered by (created_at, id) descending without COUNT/OFFSET.
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(before(query.session, model.created_at, model.id, position))
+    rows = (
+        query.order_by(model.created_at.desc(), model.id.desc())
+        .limit(per_page + 1)
+        .all()
+    )
+    items = rows[:per_page]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > per_page else None
+    return items, next_cursor
+
+
+def paginate(query, model, args, default_per_page=10, rank=None):
+    """Page a list query either by cursor or by page number.
+
+    Cursor mode skips the total count; page mode keeps the legacy response
+    shape and also hands out a next_cursor so clients can switch over.
+    `rank` (e.g. search relevance) takes precedence over recency in page
+    mode; cursor mode is always chronological.
+    """
+    page, per_page = get_pagination(args, default_per_page)
+    if wants_cursor(args):
+        items, next_cursor = keyset_page(query, model, args.get("cursor"), per_page)
+        return items, {"per_page": per_page, "next_cursor": next_cursor}
+
+    ordering = (model.created_at.desc(), model.id.desc())
+    if rank is not None:
+        ordering = (rank, *ordering)
+    pagination = query.order_by(*ordering).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+    items = pagination.items
+    has_cursor = items and pagination.has_next and rank is None
+    return items, {
+        "page": page,
+        "per_page": per_page,
+        "total": pagination.total,
+        "next_cursor": encode_cursor(items[-1]) if has_cursor else None,
+    }
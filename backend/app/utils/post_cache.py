@@ -0,0 +1,31 @@
+from urllib.parse import urlencode
+
+from flask import request
+
+from ..extensions import cache
+from .pagination import get_pagination
+
+NAMESPACE = "posts"
+LIST_FILTERS = ("tag", "user_id", "keyword", "start_date", "end_date", "cursor")
+
+
+def is_anonymous():
+    """Only requests without credentials share cached responses."""
+    return "Authorization" not in request.headers
+
+
+def post_key(post_id):
+    return f"{NAMESPACE}:item:{post_id}"
+
+
+def post_list_key(args):
+    page, per_page = get_pagination(args)
+    params = [(name, args[name].strip()) for name in LIST_FILTERS if name in args]
+    params += [("page", page), ("per_page", per_page)]
+    return f"{NAMESPACE}:list:{cache.generation(NAMESPACE)}:{urlencode(sorted(params))}"
+
+
+def invalidate_posts(*post_ids):
+    """Drop cached single-post reads and every cached listing page."""
+    cache.delete(*(post_key(post_id) for post_id in post_ids))
+    cache.bump(NAMESPACE)
@@ -1,12 +1,47 @@
-from flask import jsonify
+from flask import current_app, jsonify, request
 
 
-def ok(data=None, message="ok", status=200):
+def ok(data=None, message="ok", status=200, etag=None, last_modified=None):
     payload = {"message": message}
     if data is not None:
         payload["data"] = data
-    return jsonify(payload), status
+    response = jsonify(payload)
+    _set_validators(response, etag, last_modified)
+    return response, status
 
 
 def error(message="error", status=400):
     return jsonify({"message": message}), status
+
+
+def retry_later(message, status, retry_after):
+    """An error response telling the client how many seconds to back off (429/503)."""
+    return jsonify({"message": message}), status, {"Retry-After": str(retry_after)}
+
+
+def not_modified(etag=None, last_modified=None):
+    """Return a 304 response when the request's validators still match, else None.
+
+    Call before loading/serializing the body. When an ETag is given it is the
+    only validator checked (If-None-Match wins over If-Modified-Since).
+    """
+    if etag is not None:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif last_modified is not None and request.if_modified_since is not None:
+        # Naive timestamps are UTC; HTTP dates have whole-second precision.
+        since = request.if_modified_since.replace(tzinfo=None)
+        fresh = last_modified.replace(microsecond=0, tzinfo=None) <= since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    response = current_app.response_class(status=304)
+    _set_validators(response, etag, last_modified)
+    return response
+
+
+def _set_validators(response, etag, last_modified):
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
@@ -0,0 +1,15 @@
+"""ASGI entry point (see app/asgi.py).
+
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+gunicorn.conf.py in this directory preloads it and sizes the workers.
+"""
+import os
+
+os.environ.setdefault("FLASK_CONFIG", "production")
+
+from app import create_app  # noqa: E402
+from app.asgi import AsgiAdapter  # noqa: E402
+from app.prefork import load  # noqa: E402
+
+app = load(lambda: AsgiAdapter(create_app()))
@@ -9,6 +9,72 @@ class BaseConfig:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt-secret")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=12)
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
+    UPLOAD_MAX_IMAGE_BYTES = int(os.getenv("UPLOAD_MAX_IMAGE_BYTES", 20 * 1024 * 1024))
+    UPLOAD_MAX_VIDEO_BYTES = int(os.getenv("UPLOAD_MAX_VIDEO_BYTES", 500 * 1024 * 1024))
+    MEDIA_GC_GRACE_SECONDS = int(os.getenv("MEDIA_GC_GRACE_SECONDS", 3600))
+    UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))
+    # Hard ceiling enforced by Werkzeug while parsing; multipart framing needs a little slack.
+    MAX_CONTENT_LENGTH = UPLOAD_MAX_VIDEO_BYTES + 1024 * 1024
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", 60))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+    UPLOAD_SERVE_MODE = os.getenv("UPLOAD_SERVE_MODE", "direct")
+    UPLOAD_ACCEL_PREFIX = os.getenv("UPLOAD_ACCEL_PREFIX", "/_uploads/")
+    UPLOAD_CACHE_MAX_AGE = int(os.getenv("UPLOAD_CACHE_MAX_AGE", 3600))
+    TAG_CACHE_SIZE = int(os.getenv("TAG_CACHE_SIZE", 4096))
+    TRENDING_BUCKET_SECONDS = int(os.getenv("TRENDING_BUCKET_SECONDS", 3600))
+    TRENDING_WINDOW_SECONDS = int(os.getenv("TRENDING_WINDOW_SECONDS", 7 * 24 * 3600))
+    TRENDING_HALF_LIFE_SECONDS = int(os.getenv("TRENDING_HALF_LIFE_SECONDS", 24 * 3600))
+    TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", 50))
+    TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", 300))
+    TIMELINE_MAX_ENTRIES = int(os.getenv("TIMELINE_MAX_ENTRIES", 800))
+    TIMELINE_FANOUT_LIMIT = int(os.getenv("TIMELINE_FANOUT_LIMIT", 1000))
+    MEDIA_PROCESSING = os.getenv("MEDIA_PROCESSING", "async")
+    MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", 2))
+    # Engine tuning (see app/services/engine_service.py); ProductionConfig turns it on.
+    DB_TUNING = os.getenv("DB_TUNING", "false").lower() == "true"
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+    DATABASE_REPLICA_URLS = [
+        url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+    ASGI_THREADS = int(os.getenv("ASGI_THREADS", 32))
+    ASGI_SPOOL_BYTES = int(os.getenv("ASGI_SPOOL_BYTES", 1024 * 1024))
+    PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "scrypt")
+    PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", 32768))
+    PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", 8))
+    PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", 1))
+    PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2))
+    PASSWORD_ARGON2_MEMORY_KIB = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", 19456))
+    PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 1))
+    PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 1000000))
+    PASSWORD_HASH_THREADS = int(os.getenv("PASSWORD_HASH_THREADS", 4))
+    PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 32))
+    AUTH_RATE_LIMIT_WINDOW = int(os.getenv("AUTH_RATE_LIMIT_WINDOW", 60))
+    AUTH_RATE_LIMIT_PER_IP = int(os.getenv("AUTH_RATE_LIMIT_PER_IP", 20))
+    AUTH_RATE_LIMIT_PER_USERNAME = int(os.getenv("AUTH_RATE_LIMIT_PER_USERNAME", 5))
+    IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", 30))
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", 10000))
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+    BULK_DELETE_CHUNK = int(os.getenv("BULK_DELETE_CHUNK", 500))
+    BULK_DELETE_MAX = int(os.getenv("BULK_DELETE_MAX", 5000))
+    INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "false").lower() == "true"
+    SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", 200))
+    QUERY_COUNT_WARN = int(os.getenv("QUERY_COUNT_WARN", 20))
+    METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    THUMBNAIL_SIZES = tuple(
+        int(size) for size in os.getenv("THUMBNAIL_SIZES", "320,640").split(",") if size
+    )
 
 
 class DevelopmentConfig(BaseConfig):
@@ -17,8 +83,11 @@ class DevelopmentConfig(BaseConfig):
 
 class ProductionConfig(BaseConfig):
     DEBUG = False
+    DB_TUNING = os.getenv("DB_TUNING", "true").lower() == "true"
 
 
 class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    MEDIA_PROCESSING = "sync"
+    PASSWORD_SCRYPT_N = 1024
@@ -0,0 +1,114 @@
+"""gunicorn settings, read automatically when gunicorn starts in backend/.
+
+    gunicorn wsgi:app                                   # gthread workers
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn asgi:app
+
+The app is preloaded in the master (``GUNICORN_PRELOAD``, default on), so
+``create_app``, mapper configuration and imports happen once. Workers share
+those pages copy-on-write (see app/prefork.py). Worker and thread counts
+follow the CPUs this process may use, including a cgroup quota.
+``WEB_CONCURRENCY`` and ``GUNICORN_THREADS`` override them.
+
+Reloading: a preloaded app cannot be reloaded in place. ``kill -HUP`` only
+restarts the workers from the master's copy, so it re-reads this file but
+keeps the old code. To deploy new code without dropping connections, send
+``USR2`` (a new master with the new code starts next to the old one), then
+``WINCH`` and ``QUIT`` to the old master once the new workers are up.
+Workers get ``GUNICORN_GRACEFUL_TIMEOUT`` seconds to finish in-flight
+requests. They are also recycled after about ``GUNICORN_MAX_REQUESTS``
+requests, with jitter so they do not all restart together.
+"""
+import math
+import os
+import time
+
+_started = time.monotonic()
+
+
+def _cpu_count():
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        # cgroup v2 quota, e.g. "200000 100000" for two CPUs or "max 100000".
+        with open("/sys/fs/cgroup/cpu.max") as quota_file:
+            quota, period = quota_file.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def _flag(name, default):
+    return os.getenv(name, default).lower() == "true"
+
+
+cpus = _cpu_count()
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+_async_workers = "uvicorn" in worker_class
+
+wsgi_app = "asgi:app" if _async_workers else "wsgi:app"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5001")
+# Event-loop workers need one process per core (their views run on ASGI_THREADS);
+# threaded workers also wait on the database, so they use the usual 2 * cores + 1.
+workers = int(os.getenv("WEB_CONCURRENCY", cpus if _async_workers else 2 * cpus + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+preload_app = _flag("GUNICORN_PRELOAD", "true")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+# Heartbeat files on tmpfs: a slow disk must not make the master kill healthy workers.
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def _elapsed_ms(since):
+    return (time.monotonic() - since) * 1000
+
+
+def when_ready(server):
+    message = f"master ready in {_elapsed_ms(_started):.0f} ms, {server.cfg.workers} workers"
+    if server.cfg.preload_app:
+        from app.prefork import flask_app
+
+        timings = flask_app(server.app.wsgi()).extensions.get("startup", {})
+        message += (
+            f", app preloaded (create_app {timings.get('create_app_ms')} ms,"
+            f" warm-up {timings.get('warmup_ms')} ms,"
+            f" {timings.get('frozen_objects')} objects frozen)"
+        )
+    server.log.info(message)
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.monotonic()
+    if server.cfg.preload_app:
+        from app.prefork import after_fork
+
+        after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    worker.log.info(
+        "worker %s ready in %.0f ms after fork", worker.pid, _elapsed_ms(worker.forked_at)
+    )
+
+
+def worker_exit(server, worker):
+    app = getattr(worker, "wsgi", None)
+    if app is not None:
+        from app.prefork import before_exit
+
+        before_exit(app)
+
+
+def on_reload(server):
+    if server.cfg.preload_app:
+        server.log.info("HUP with a preloaded app restarts workers on the loaded code; "
+                        "use USR2 to deploy new code")
@@ -0,0 +1,35 @@
+"""tag usage buckets
+
+Revision ID: 0a4d7c2e9b65
+Revises: f06b2d8e5a19
+Create Date: 2026-10-18 15:17:44.902361
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a4d7c2e9b65'
+down_revision = 'f06b2d8e5a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tag_usage',
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ),
+    sa.PrimaryKeyConstraint('tag_id', 'bucket')
+    )
+    with op.batch_alter_table('tag_usage', schema=None) as batch_op:
+        batch_op.create_index('ix_tag_usage_bucket', ['bucket'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tag_usage', schema=None) as batch_op:
+        batch_op.drop_index('ix_tag_usage_bucket')
+
+    op.drop_table('tag_usage')
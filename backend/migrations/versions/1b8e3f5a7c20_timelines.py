@@ -0,0 +1,50 @@
+"""friend counts and home timelines
+
+Revision ID: 1b8e3f5a7c20
+Revises: 0a4d7c2e9b65
+Create Date: 2026-10-18 15:48:26.117093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b8e3f5a7c20'
+down_revision = '0a4d7c2e9b65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('timeline_entries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    with op.batch_alter_table('timeline_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_timeline_entries_post_id', ['post_id'], unique=False)
+        batch_op.create_index('ix_timeline_entries_user_id_created_at', ['user_id', 'created_at', 'post_id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('friend_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        "UPDATE users SET friend_count = ("
+        "SELECT COUNT(*) FROM friends WHERE friends.status = 'accepted' "
+        "AND (friends.user_id = users.id OR friends.friend_id = users.id))"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('friend_count')
+
+    with op.batch_alter_table('timeline_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_timeline_entries_user_id_created_at')
+        batch_op.drop_index('ix_timeline_entries_post_id')
+
+    op.drop_table('timeline_entries')
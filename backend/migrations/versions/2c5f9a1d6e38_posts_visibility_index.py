@@ -0,0 +1,26 @@
+"""posts visibility index
+
+Revision ID: 2c5f9a1d6e38
+Revises: 1b8e3f5a7c20
+Create Date: 2026-10-18 16:20:52.640318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c5f9a1d6e38'
+down_revision = '1b8e3f5a7c20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_visibility_created_at', ['visibility', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_visibility_created_at')
@@ -0,0 +1,47 @@
+"""hot path indexes
+
+Revision ID: 3f9c2a7b41d6
+Revises: dd5525580524
+Create Date: 2026-10-18 10:12:40.512316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7b41d6'
+down_revision = 'dd5525580524'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Duplicate (post_id, user_id) ratings could only come from the old
+    # check-then-insert race; keep the newest row so the unique index applies.
+    op.execute(
+        "DELETE FROM ratings WHERE id NOT IN "
+        "(SELECT MAX(id) FROM ratings GROUP BY post_id, user_id)"
+    )
+
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+    op.create_index('ix_posts_user_id_created_at', 'posts', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_comments_post_id_created_at', 'comments', ['post_id', 'created_at', 'id'], unique=False)
+    op.create_index('uq_ratings_post_id_user_id', 'ratings', ['post_id', 'user_id'], unique=True)
+    op.create_index('ix_post_tags_tag_id', 'post_tags', ['tag_id', 'post_id'], unique=False)
+    op.create_index('ix_media_post_id', 'media', ['post_id'], unique=False)
+    op.create_index('ix_friends_user_id_friend_id', 'friends', ['user_id', 'friend_id'], unique=False)
+    op.create_index('ix_friends_friend_id', 'friends', ['friend_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_friends_friend_id', table_name='friends')
+    op.drop_index('ix_friends_user_id_friend_id', table_name='friends')
+    op.drop_index('ix_media_post_id', table_name='media')
+    op.drop_index('ix_post_tags_tag_id', table_name='post_tags')
+    op.drop_index('uq_ratings_post_id_user_id', table_name='ratings')
+    op.drop_index('ix_comments_post_id_created_at', table_name='comments')
+    op.drop_index('ix_posts_user_id_created_at', table_name='posts')
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
+    op.drop_index('ix_users_created_at_id', table_name='users')
@@ -0,0 +1,52 @@
+"""cascade deletes
+
+Revision ID: 5e8b1c4f7a92
+Revises: 2c5f9a1d6e38
+Create Date: 2026-10-18 19:05:37.214906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b1c4f7a92'
+down_revision = '2c5f9a1d6e38'
+branch_labels = None
+depends_on = None
+
+# The original constraints are unnamed. PostgreSQL named them
+# <table>_<column>_fkey; SQLite batch mode gets the same names from this
+# convention when it reflects them.
+NAMING = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+CASCADES = {
+    'posts': [('user_id', 'users')],
+    'comments': [('post_id', 'posts'), ('user_id', 'users')],
+    'ratings': [('post_id', 'posts'), ('user_id', 'users')],
+    'media': [('post_id', 'posts')],
+    'post_tags': [('post_id', 'posts')],
+    'friends': [('user_id', 'users'), ('friend_id', 'users')],
+    'timeline_entries': [('user_id', 'users'), ('post_id', 'posts')],
+}
+
+
+def _replace_foreign_keys(ondelete):
+    for table, columns in CASCADES.items():
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING) as batch_op:
+            for column, referred in columns:
+                name = f'{table}_{column}_fkey'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+    with op.batch_alter_table('admin_logs', schema=None, naming_convention=NAMING) as batch_op:
+        batch_op.drop_constraint('admin_logs_admin_id_fkey', type_='foreignkey')
+
+
+def downgrade():
+    with op.batch_alter_table('admin_logs', schema=None, naming_convention=NAMING) as batch_op:
+        batch_op.create_foreign_key('admin_logs_admin_id_fkey', 'users', ['admin_id'], ['id'])
+    _replace_foreign_keys(None)
@@ -0,0 +1,57 @@
+"""post search index
+
+Revision ID: 7a1e5d3c9b20
+Revises: 3f9c2a7b41d6
+Create Date: 2026-10-18 11:03:27.904418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a1e5d3c9b20'
+down_revision = '3f9c2a7b41d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE posts_fts USING fts5(content, tags, tokenize='trigram')"
+        )
+        op.execute(
+            "INSERT INTO posts_fts (rowid, content, tags) "
+            "SELECT posts.id, COALESCE(posts.content, ''), "
+            "COALESCE((SELECT group_concat(tags.name, ' ') FROM post_tags "
+            "JOIN tags ON tags.id = post_tags.tag_id "
+            "WHERE post_tags.post_id = posts.id), '') FROM posts"
+        )
+    elif dialect == 'postgresql':
+        op.create_table('post_search',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('document', sa.dialects.postgresql.TSVECTOR(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id')
+        )
+        op.create_index('ix_post_search_document', 'post_search', ['document'],
+                        unique=False, postgresql_using='gin')
+        op.execute(
+            "INSERT INTO post_search (post_id, document) "
+            "SELECT posts.id, "
+            "setweight(to_tsvector('simple', COALESCE((SELECT string_agg(tags.name, ' ') "
+            "FROM post_tags JOIN tags ON tags.id = post_tags.tag_id "
+            "WHERE post_tags.post_id = posts.id), '')), 'A') || "
+            "setweight(to_tsvector('simple', COALESCE(posts.content, '')), 'B') FROM posts"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE posts_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_post_search_document', table_name='post_search')
+        op.drop_table('post_search')
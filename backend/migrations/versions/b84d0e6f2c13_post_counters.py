@@ -0,0 +1,37 @@
+"""post counters
+
+Revision ID: b84d0e6f2c13
+Revises: 7a1e5d3c9b20
+Create Date: 2026-10-18 11:48:05.216740
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b84d0e6f2c13'
+down_revision = '7a1e5d3c9b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        "UPDATE posts SET "
+        "rating_sum = (SELECT COALESCE(SUM(score), 0) FROM ratings WHERE ratings.post_id = posts.id), "
+        "rating_count = (SELECT COUNT(id) FROM ratings WHERE ratings.post_id = posts.id), "
+        "comment_count = (SELECT COUNT(id) FROM comments WHERE comments.post_id = posts.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
@@ -0,0 +1,26 @@
+"""post version
+
+Revision ID: c1f7a29e5d84
+Revises: b84d0e6f2c13
+Create Date: 2026-10-18 12:31:52.660193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1f7a29e5d84'
+down_revision = 'b84d0e6f2c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('version')
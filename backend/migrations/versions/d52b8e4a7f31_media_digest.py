@@ -0,0 +1,28 @@
+"""media digest
+
+Revision ID: d52b8e4a7f31
+Revises: c1f7a29e5d84
+Create Date: 2026-10-18 13:40:11.083529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd52b8e4a7f31'
+down_revision = 'c1f7a29e5d84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('digest', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_media_digest', ['digest'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_index('ix_media_digest')
+        batch_op.drop_column('digest')
@@ -0,0 +1,28 @@
+"""media processing status
+
+Revision ID: e93a6c1b8d47
+Revises: d52b8e4a7f31
+Create Date: 2026-10-18 14:22:37.519206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93a6c1b8d47'
+down_revision = 'd52b8e4a7f31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column('variants', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_column('variants')
+        batch_op.drop_column('status')
@@ -0,0 +1,55 @@
+"""normalize tag names
+
+Revision ID: f06b2d8e5a19
+Revises: e93a6c1b8d47
+Create Date: 2026-10-18 14:51:03.264817
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f06b2d8e5a19'
+down_revision = 'e93a6c1b8d47'
+branch_labels = None
+depends_on = None
+
+tags = sa.table('tags', sa.column('id', sa.Integer), sa.column('name', sa.String))
+post_tags = sa.table('post_tags', sa.column('post_id', sa.Integer), sa.column('tag_id', sa.Integer))
+
+
+def _normalize(name):
+    # Frozen copy of app.services.tag_service.normalize.
+    name = unicodedata.normalize('NFKC', name).strip().lstrip('#').strip()
+    return name.casefold()[:64]
+
+
+def upgrade():
+    bind = op.get_bind()
+    groups = {}
+    for tag_id, name in bind.execute(sa.select(tags.c.id, tags.c.name).order_by(tags.c.id)):
+        groups.setdefault(_normalize(name), []).append((tag_id, name))
+
+    for normalized, members in groups.items():
+        keep_id, keep_name = members[0]
+        for tag_id, _ in members[1:]:
+            # Move links onto the surviving tag, skipping posts that already have it.
+            linked = sa.select(post_tags.c.post_id).where(post_tags.c.tag_id == keep_id)
+            bind.execute(
+                post_tags.delete().where(post_tags.c.tag_id == tag_id, post_tags.c.post_id.in_(linked))
+            )
+            bind.execute(post_tags.update().where(post_tags.c.tag_id == tag_id).values(tag_id=keep_id))
+            bind.execute(tags.delete().where(tags.c.id == tag_id))
+        if not normalized:
+            bind.execute(post_tags.delete().where(post_tags.c.tag_id == keep_id))
+            bind.execute(tags.delete().where(tags.c.id == keep_id))
+        elif normalized != keep_name:
+            bind.execute(tags.update().where(tags.c.id == keep_id).values(name=normalized))
+
+
+def downgrade():
+    # Merged tags cannot be split again; names simply stay normalized.
+    pass
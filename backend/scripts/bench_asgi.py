@@ -0,0 +1,188 @@
+"""Compare feed throughput under concurrent connections: WSGI vs the ASGI adapter.
+
+Both servers get the same worker and thread budget and a seeded SQLite
+database. For each round, --readers keep-alive clients hammer
+GET /api/posts for --seconds while a number of slow clients trickle upload
+bodies to POST /api/upload. Under WSGI each slow upload holds a worker
+thread until its last byte arrives. Under the ASGI adapter it only holds a
+coroutine, so the readers keep their throughput.
+
+Both modes run under gunicorn: gthread workers for WSGI, uvicorn workers
+for ASGI.
+
+Usage (from backend/, needs gunicorn and uvicorn installed):
+    python scripts/bench_asgi.py --workers 2 --threads 8 --readers 16 --slow 0 16
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from seed_data import seed  # noqa: E402
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SLOW_BODY = 256 * 1024
+
+
+def prepare(workdir, posts):
+    from flask_migrate import upgrade
+
+    from app import create_app
+    from app.extensions import db
+    from config import ProductionConfig
+
+    url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    class PrepareConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = url
+
+    app = create_app(PrepareConfig)
+    with app.app_context():
+        upgrade(directory=os.path.join(BACKEND, "migrations"))
+        seed(users=max(100, posts // 50), posts=posts, comments_per_post=1, ratings_per_post=1)
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+    return url
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(kind, port, args, env):
+    # gunicorn manages the processes in both modes so only the worker type differs.
+    command = ["gunicorn", "--workers", str(args.workers), "--bind", f"127.0.0.1:{port}"]
+    if kind == "wsgi":
+        command += ["--threads", str(args.threads), "wsgi:app"]
+    else:
+        command += ["--worker-class", "uvicorn.workers.UvicornWorker", "asgi:app"]
+    process = subprocess.Popen(command, cwd=BACKEND, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/api/tags/trending")
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit(f"{kind} server did not start: {' '.join(command)}")
+
+
+def slow_upload(port, seconds, stop):
+    """Send an upload whose body trickles in over `seconds`."""
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=seconds + 30) as sock:
+            sock.sendall(
+                f"POST /api/upload?filename=slow.png HTTP/1.1\r\nHost: bench\r\n"
+                f"Content-Type: image/png\r\nContent-Length: {SLOW_BODY}\r\n\r\n".encode()
+            )
+            steps = 64
+            for _ in range(steps):
+                if stop.is_set():
+                    return
+                sock.sendall(b"\0" * (SLOW_BODY // steps))
+                time.sleep(seconds / steps)
+            sock.recv(4096)
+    except OSError:
+        pass
+
+
+def reader(port, stop, latencies):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            connection.request("GET", "/api/posts?cursor=")
+            connection.getresponse().read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def run_round(port, args, slow):
+    stop = threading.Event()
+    latencies = []
+    threads = [threading.Thread(target=slow_upload, args=(port, args.seconds * 2, stop))
+               for _ in range(slow)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)  # let the slow uploads occupy whatever they occupy
+    readers = [threading.Thread(target=reader, args=(port, stop, latencies))
+               for _ in range(args.readers)]
+    for thread in readers:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in readers + threads:
+        thread.join()
+    ordered = sorted(latency * 1000 for latency in latencies)
+    if not ordered:
+        return {"slow_uploads": slow, "requests": 0, "rps": 0.0, "p50_ms": None, "p99_ms": None}
+    return {
+        "slow_uploads": slow,
+        "requests": len(ordered),
+        "rps": round(len(ordered) / args.seconds, 1),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p99_ms": round(ordered[max(0, int(len(ordered) * 0.99) - 1)], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="gunicorn --threads / ASGI_THREADS")
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--slow", type=int, nargs="+", default=[0, 16],
+                        help="slow upload connections per round")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_asgi_")
+    env = {
+        **os.environ,
+        "FLASK_CONFIG": "production",
+        "DATABASE_URL": prepare(workdir, args.posts),
+        "UPLOAD_FOLDER": os.path.join(workdir, "uploads"),
+        "MEDIA_PROCESSING": "off",
+        "ASGI_THREADS": str(args.threads),
+    }
+    results = {}
+    print(f"{'mode':<6}{'slow':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for kind in ("wsgi", "asgi"):
+        port = _free_port()
+        process = start_server(kind, port, args, env)
+        try:
+            results[kind] = []
+            for slow in args.slow:
+                row = run_round(port, args, slow)
+                results[kind].append(row)
+                print(f"{kind:<6}{slow:>6}{row['rps']:>10}{str(row['p50_ms']):>10}"
+                      f"{str(row['p99_ms']):>10}")
+        finally:
+            process.terminate()
+            process.wait()
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump({"args": vars(args), "results": results}, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Show query plans and timings for the hot list/lookup queries with and without
+the secondary indexes from migration 3f9c2a7b41d6.
+
+Usage (from backend/):
+    python scripts/bench_indexes.py --posts 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Comment, Friend, Post, Rating, Tag  # noqa: E402
+from seed_data import seed  # noqa: E402
+
+REPEAT = 20
+
+
+def hot_queries():
+    return {
+        "posts by user": Post.query.filter(Post.user_id == 7)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(10),
+        "posts by date range": Post.query.filter(
+            Post.created_at >= db.func.datetime("now", "-7 days")
+        )
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(10),
+        "posts by tag": Post.query.join(Post.tags)
+        .filter(Tag.name == "coffee3")
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(10),
+        "comments of post": Comment.query.filter_by(post_id=42)
+        .order_by(Comment.created_at.desc(), Comment.id.desc())
+        .limit(10),
+        "rating lookup": Rating.query.filter_by(post_id=42, user_id=7).limit(1),
+        "friends of user": Friend.query.filter(
+            db.or_(Friend.user_id == 7, Friend.friend_id == 7)
+        ),
+    }
+
+
+def indexes():
+    return [
+        index
+        for table in db.metadata.sorted_tables
+        for index in table.indexes
+        if index.name.startswith(("ix_", "uq_"))
+    ]
+
+
+def report(label):
+    print(f"\n== {label} ==")
+    for name, query in hot_queries().items():
+        sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+        plan = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        started = time.perf_counter()
+        for _ in range(REPEAT):
+            query.all()
+        elapsed_ms = (time.perf_counter() - started) * 1000 / REPEAT
+        print(f"{name:<22} {elapsed_ms:8.2f} ms")
+        for row in plan:
+            print(f"    {row[-1]}")
+    db.session.remove()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--posts", type=int, default=50000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+
+    class BenchConfig:
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        seed(users=args.users, posts=args.posts)
+        with db.engine.begin() as conn:
+            for index in indexes():
+                index.drop(conn)
+            conn.exec_driver_sql("ANALYZE")
+        report("without secondary indexes")
+        with db.engine.begin() as conn:
+            for index in indexes():
+                index.create(conn)
+            conn.exec_driver_sql("ANALYZE")
+        report("with secondary indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Measure feed queries with visibility filtering against the unfiltered feed.
+
+Seeds a database with a public/friends/private mix, then times the listing
+queries list_posts issues (first page and a deep cursor page) for an
+anonymous and a signed-in viewer, with and without
+ix_posts_visibility_created_at.
+
+Usage (from backend/):
+    python scripts/bench_visibility.py --posts 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Post, Tag  # noqa: E402
+from app.services import visibility_service  # noqa: E402
+from app.utils.pagination import keyset_page  # noqa: E402
+from seed_data import seed  # noqa: E402
+
+REPEAT = 30
+PER_PAGE = 10
+VIEWER = 7
+MIX = {"public": 80, "friends": 15, "private": 5}
+
+
+def feed(viewer=None, anonymous=False):
+    query = Post.query.options(*Post.listing_options())
+    if anonymous or viewer is not None:
+        query = visibility_service.filter_visible(query, viewer)
+    return query
+
+
+def deep_cursor():
+    """Cursor pointing roughly at the middle of the posts table."""
+    post = (
+        Post.query.order_by(Post.created_at.desc(), Post.id.desc())
+        .offset(Post.query.count() // 2)
+        .first()
+    )
+    from app.utils.pagination import encode_cursor
+
+    return encode_cursor(post)
+
+
+def scenarios(cursor):
+    return {
+        "unfiltered (baseline)": lambda c: keyset_page(feed(), Post, c, PER_PAGE),
+        "anonymous": lambda c: keyset_page(feed(anonymous=True), Post, c, PER_PAGE),
+        "signed-in viewer": lambda c: keyset_page(feed(VIEWER), Post, c, PER_PAGE),
+        "viewer + tag": lambda c: keyset_page(
+            feed(VIEWER).join(Post.tags).filter(Tag.name == "coffee9"), Post, c, PER_PAGE
+        ),
+    }
+
+
+def plan(run, cursor):
+    statements = []
+    db.event.listen(db.engine, "before_cursor_execute", capture := (
+        lambda conn, cur, statement, params, context, many: statements.append((statement, params))
+    ))
+    try:
+        run(cursor)
+    finally:
+        db.event.remove(db.engine, "before_cursor_execute", capture)
+    statement, params = statements[0]
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def report(label, cursor):
+    print(f"\n== {label} ==")
+    print(f"{'query':<24}{'page':>6}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, run in scenarios(cursor).items():
+        for page, position in (("first", ""), ("deep", cursor)):
+            timings = []
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                run(position)
+                timings.append((time.perf_counter() - started) * 1000)
+                db.session.remove()
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{name:<24}{page:>6}{statistics.median(timings):10.2f}{p95:10.2f}")
+        for line in plan(run, ""):
+            print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--posts", type=int, default=1000000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_visibility.db")
+
+    class BenchConfig:
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(users=args.users, posts=args.posts, comments_per_post=0, ratings_per_post=0,
+             visibility_weights=MIX)
+        print(f"seeded {args.posts} posts in {time.perf_counter() - started:.1f}s")
+        cursor = deep_cursor()
+        index = next(
+            index for index in Post.__table__.indexes
+            if index.name == "ix_posts_visibility_created_at"
+        )
+        with db.engine.begin() as conn:
+            index.drop(conn)
+            conn.exec_driver_sql("ANALYZE")
+        report("without ix_posts_visibility_created_at", cursor)
+        with db.engine.begin() as conn:
+            index.create(conn)
+            conn.exec_driver_sql("ANALYZE")
+        report("with ix_posts_visibility_created_at", cursor)
+
+
+if __name__ == "__main__":
+    main()
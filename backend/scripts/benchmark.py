@@ -0,0 +1,399 @@
+"""Benchmark every API blueprint and record latency percentiles to a JSON baseline.
+
+Two drivers share one scenario list:
+
+  client  in-process Flask test client against a freshly migrated and seeded
+          SQLite database (or --database); SQL statements per request are
+          counted from engine events.
+  http    concurrent requests against a running server (--url) seeded with
+          seed_data.py; SQL counts are read from the Server-Timing header
+          when the server runs with INSTRUMENTATION_ENABLED=true. Start it with
+          AUTH_RATE_LIMIT_PER_IP=0 AUTH_RATE_LIMIT_PER_USERNAME=0, or the login
+          scenarios are throttled.
+
+Resumable upload sessions opened by the upload scenarios are aborted when the
+run ends, so nothing is left behind in the server's UPLOAD_FOLDER.
+
+Each scenario reports p50/p95/p99/mean latency, throughput, errors and
+queries per request. --compare flags scenarios whose p95 grew by more than
+--tolerance or whose query count went up, and exits non-zero if any did.
+
+Usage (from backend/):
+    python scripts/benchmark.py --scale 10k --output /tmp/baseline.json
+    python scripts/benchmark.py --scale 10k --compare /tmp/baseline.json
+    python scripts/benchmark.py --mode http --url http://127.0.0.1:8000 \\
+        --concurrency 16 --requests 500 --output /tmp/http.json
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from seed_data import SCALES, seed  # noqa: E402
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def _png():
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 120, 40)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class Context:
+    """Ids and tokens discovered through the API before timing starts."""
+
+    def __init__(self, send):
+        self.run = int(time.time())
+        self.admin = self._login(send, "user1")
+        self.user = self._login(send, "user2")
+        _, body = send("GET", "/api/posts?per_page=50&cursor=", headers=self.user)
+        items = body["data"]["items"]
+        if not items:
+            raise SystemExit("the database has no posts; seed it first")
+        self.post_ids = [item["id"] for item in items]
+        tags = [tag for item in items for tag in item.get("tags") or []]
+        self.tag = tags[0] if tags else "coffee"
+        self.keyword = (items[0].get("content") or "coffee").split()[0]
+        self.image = _png()
+        _, body = send(
+            "POST", "/api/uploads", headers=self.user,
+            json={"filename": "bench.png", "mimetype": "image/png", "size": len(self.image)},
+        )
+        self.upload_id = body["data"]["upload_id"]
+        self._uploads = {self.upload_id}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _login(send, username):
+        status, body = send("POST", "/api/auth/login",
+                            json={"username": username, "password": "password"})
+        if status != 200:
+            raise SystemExit(f"cannot log in as {username}; seed with seed_data.py (--admins 1)")
+        return {"Authorization": f"Bearer {body['data']['access_token']}"}
+
+    def post(self, i):
+        return self.post_ids[i % len(self.post_ids)]
+
+    def remember(self, body):
+        """Note upload sessions opened by a timed request, for ``close``."""
+        data = (body or {}).get("data")
+        if isinstance(data, dict) and data.get("upload_id"):
+            with self._lock:
+                self._uploads.add(data["upload_id"])
+
+    def close(self, send):
+        for upload_id in sorted(self._uploads):
+            send("DELETE", f"/api/uploads/{upload_id}", headers=self.user)
+        self._uploads.clear()
+
+
+def scenarios(ctx):
+    """(name, blueprint, writes, build(i) -> (method, path, kwargs))."""
+    return [
+        ("login", "auth", False, lambda i: (
+            "POST", "/api/auth/login", {"json": {"username": "user2", "password": "password"}})),
+        ("register", "auth", True, lambda i: (
+            "POST", "/api/auth/register",
+            {"json": {"username": f"bench{ctx.run}_{i}", "password": "password"}})),
+        ("list posts", "content", False, lambda i: ("GET", "/api/posts?cursor=", {})),
+        ("list posts page 20", "content", False, lambda i: ("GET", "/api/posts?page=20", {})),
+        ("list posts signed in", "content", False, lambda i: (
+            "GET", "/api/posts?cursor=", {"headers": ctx.user})),
+        ("list posts by tag", "content", False, lambda i: (
+            "GET", f"/api/posts?cursor=&tag={ctx.tag}", {})),
+        ("search posts", "content", False, lambda i: (
+            "GET", f"/api/posts?cursor=&keyword={ctx.keyword}", {})),
+        ("get post", "content", False, lambda i: ("GET", f"/api/posts/{ctx.post(i)}", {})),
+        ("list comments", "content", False, lambda i: (
+            "GET", f"/api/posts/{ctx.post(i)}/comments?cursor=", {})),
+        ("home timeline", "content", False, lambda i: (
+            "GET", "/api/timeline", {"headers": ctx.user})),
+        ("create post", "content", True, lambda i: (
+            "POST", "/api/posts",
+            {"headers": ctx.user, "json": {"content": f"bench {i}", "tags": ["bench", ctx.tag]}})),
+        ("create comment", "content", True, lambda i: (
+            "POST", f"/api/posts/{ctx.post(i)}/comments",
+            {"headers": ctx.user, "json": {"content": f"bench {i}"}})),
+        ("rate post", "content", True, lambda i: (
+            "POST", f"/api/posts/{ctx.post(i)}/ratings",
+            {"headers": ctx.user, "json": {"score": i % 5 + 1}})),
+        ("upload image", "content", True, lambda i: (
+            "POST", "/api/upload?filename=bench.png",
+            {"headers": {**ctx.user, "Content-Type": "image/png"}, "data": ctx.image})),
+        ("get me", "user", False, lambda i: ("GET", "/api/users/me", {"headers": ctx.user})),
+        ("update me", "user", True, lambda i: (
+            "PUT", "/api/users/me", {"headers": ctx.user, "json": {"avatar": f"/a/{i}.png"}})),
+        ("admin users", "admin", False, lambda i: (
+            "GET", "/api/admin/users", {"headers": ctx.admin})),
+        ("admin posts", "admin", False, lambda i: (
+            "GET", "/api/admin/posts", {"headers": ctx.admin})),
+        ("admin stats", "admin", False, lambda i: (
+            "GET", "/api/admin/stats", {"headers": ctx.admin})),
+        ("upload status", "upload", False, lambda i: (
+            "GET", f"/api/uploads/{ctx.upload_id}", {"headers": ctx.user})),
+        ("create upload session", "upload", True, lambda i: (
+            "POST", "/api/uploads",
+            {"headers": ctx.user,
+             "json": {"filename": "bench.png", "mimetype": "image/png", "size": 1024}})),
+        ("trending tags", "tag", False, lambda i: ("GET", "/api/tags/trending", {})),
+        ("list friends", "friend", False, lambda i: (
+            "GET", "/api/friends", {"headers": ctx.user})),
+        ("friend requests", "friend", False, lambda i: (
+            "GET", "/api/friends/requests", {"headers": ctx.user})),
+    ]
+
+
+class ClientDriver:
+    def __init__(self, app):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        self.client = app.test_client()
+        self.queries = 0
+        event.listen(Engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.queries += 1
+
+    def send(self, method, path, json=None, data=None, headers=None):
+        response = self.client.open(path, method=method, json=json, data=data, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+    def measure(self, build, indexes, concurrency, on_body):
+        samples = []
+        started = time.perf_counter()
+        for i in indexes:
+            method, path, kwargs = build(i)
+            self.queries = 0
+            begin = time.perf_counter()
+            status, body = self.send(method, path, **kwargs)
+            samples.append((time.perf_counter() - begin, status, self.queries))
+            on_body(body)
+        return samples, time.perf_counter() - started
+
+
+class HttpDriver:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def _open(self, method, path, data=None, headers=None, **kwargs):
+        headers = dict(headers or {})
+        if "json" in kwargs:
+            data = json.dumps(kwargs["json"]).encode()
+            headers["Content-Type"] = "application/json"
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.read(), response.headers
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read(), exc.headers
+
+    @staticmethod
+    def _json(body):
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    def send(self, method, path, **kwargs):
+        status, body, _ = self._open(method, path, **kwargs)
+        return status, self._json(body)
+
+    def _timed(self, method, path, kwargs, on_body):
+        begin = time.perf_counter()
+        status, body, headers = self._open(method, path, **kwargs)
+        elapsed = time.perf_counter() - begin
+        on_body(self._json(body))
+        match = SERVER_TIMING_QUERIES.search(headers.get("Server-Timing", ""))
+        return elapsed, status, int(match.group(1)) if match else None
+
+    def measure(self, build, indexes, concurrency, on_body):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(lambda i: self._timed(*build(i), on_body), indexes))
+        return samples, time.perf_counter() - started
+
+
+def percentile(ordered, pct):
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(blueprint, samples, wall):
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+    queries = [count for _, _, count in samples if count is not None]
+    return {
+        "blueprint": blueprint,
+        "requests": len(samples),
+        "errors": sum(1 for _, status, _ in samples if status >= 400),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "throughput_rps": round(len(samples) / wall, 1),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def run(driver, ctx, args):
+    results = {}
+    for name, blueprint, writes, build in scenarios(ctx):
+        if writes and args.read_only:
+            continue
+        if args.only and not any(part in name for part in args.only):
+            continue
+        # Distinct indexes keep warm-up writes from colliding with timed ones.
+        driver.measure(build, range(args.warmup), args.concurrency, ctx.remember)
+        samples, wall = driver.measure(
+            build, range(args.warmup, args.warmup + args.requests), args.concurrency,
+            ctx.remember,
+        )
+        results[name] = summarize(blueprint, samples, wall)
+        row = results[name]
+        queries = "-" if row["queries_per_request"] is None else row["queries_per_request"]
+        print(f"{name:<24}{row['p50_ms']:9.2f}{row['p95_ms']:9.2f}{row['p99_ms']:9.2f}"
+              f"{row['throughput_rps']:9.1f}{queries:>8}{row['errors']:>7}")
+    return results
+
+
+def compare(results, path, tolerance):
+    with open(path) as source:
+        baseline = json.load(source)["scenarios"]
+    regressions = 0
+    print(f"\n{'scenario':<24}{'p95 before':>12}{'p95 now':>10}{'change':>9}"
+          f"{'queries':>14}")
+    for name, row in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0
+        # Sub-millisecond jitter is not a regression whatever the ratio says.
+        slower = change > tolerance and row["p95_ms"] - old["p95_ms"] > 1
+        more_queries = (row["queries_per_request"] or 0) > (old["queries_per_request"] or 0)
+        flag = "  REGRESSION" if slower or more_queries else ""
+        regressions += bool(flag)
+        print(f"{name:<24}{old['p95_ms']:12.2f}{row['p95_ms']:10.2f}{change:+9.0%}"
+              f"{str(old['queries_per_request']):>7}->{str(row['queries_per_request']):<6}{flag}")
+    return regressions
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True,
+            text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def client_app(args):
+    from flask_migrate import upgrade
+
+    from app import create_app
+    from app.extensions import db
+    from app.services import search_service, timeline_service, trending_service
+    from config import ProductionConfig
+
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    url = args.database or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    class BenchConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = url
+        UPLOAD_FOLDER = os.path.join(workdir, "uploads")
+        # Thumbnailing runs outside the request path; keep it out of the numbers.
+        MEDIA_PROCESSING = "off"
+        # Every scenario signs in from one address; the auth limiter would answer 429.
+        AUTH_RATE_LIMIT_PER_IP = 0
+        AUTH_RATE_LIMIT_PER_USERNAME = 0
+
+    app = create_app(BenchConfig)
+    if args.database:
+        return app
+    with app.app_context():
+        upgrade(directory=os.path.join(BACKEND, "migrations"))
+        started = time.perf_counter()
+        seed(users=args.users, posts=args.posts, admins=1)
+        if search_service.backend():
+            search_service.rebuild()
+        trending_service.rebuild()
+        for user_id in (1, 2):
+            timeline_service.rebuild(user_id)
+        db.session.commit()
+        # Planner statistics, as a maintained database would have them.
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+        print(f"seeded {args.users} users / {args.posts} posts in "
+              f"{time.perf_counter() - started:.1f}s ({url})")
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("client", "http"), default="client")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="server for --mode http")
+    parser.add_argument("--database", help="existing seeded database for --mode client")
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8, help="threads for --mode http")
+    parser.add_argument("--read-only", action="store_true", help="skip scenarios that write")
+    parser.add_argument("--only", nargs="*", help="run scenarios whose name contains any of these")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth")
+    args = parser.parse_args()
+    args.posts, args.users = SCALES[args.scale]
+
+    if args.mode == "client":
+        driver = ClientDriver(client_app(args))
+        args.concurrency = 1
+    else:
+        driver = HttpDriver(args.url)
+    ctx = Context(driver.send)
+
+    print(f"\n{'scenario':<24}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'sql':>8}{'errors':>7}")
+    try:
+        results = run(driver, ctx, args)
+    finally:
+        ctx.close(driver.send)
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "mode": args.mode,
+            "scale": args.scale if not args.database and args.mode == "client" else None,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
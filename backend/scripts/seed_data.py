@@ -0,0 +1,185 @@
+"""Seed a database with synthetic users, posts, tags, media, comments, ratings and friends.
+
+Usage (from backend/):
+    python scripts/seed_data.py --database sqlite:////tmp/bench.db --posts 100000
+    python scripts/seed_data.py --database sqlite:////tmp/bench.db --scale 1m
+
+Rows are generated and inserted in chunks of CHUNK, so memory stays flat from
+the 10k preset up to 10m (posts; every post also gets tags, one media row,
+comments and ratings by default). All users share the password "password".
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.extensions import db  # noqa: E402
+from app.models import Comment, Friend, Media, Post, PostTag, Rating, Tag, User  # noqa: E402
+from app.services import counter_service, friend_service  # noqa: E402
+
+CHUNK = 5000
+# --scale presets: posts and users.
+SCALES = {
+    "10k": (10_000, 500),
+    "100k": (100_000, 5_000),
+    "1m": (1_000_000, 20_000),
+    "10m": (10_000_000, 100_000),
+}
+WORDS = (
+    "travel food sunset coffee city night music friends weekend cat dog photo "
+    "beach mountain rain book movie game code run bike lake summer winter"
+).split()
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[start : start + CHUNK])
+
+
+def seed(users=1000, posts=10000, tags=200, comments_per_post=3, ratings_per_post=3,
+         friends_per_user=10, media_per_post=1, admins=0, seed_value=42,
+         visibility_weights=None):
+    """Bulk-insert a synthetic dataset into the current app's database.
+
+    `visibility_weights` maps visibility -> weight (e.g. {"public": 80,
+    "friends": 15, "private": 5}); by default every post is public. The
+    first `admins` users get the admin role.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    # Hashing once is enough: seeded accounts only exist to own content.
+    probe = User(username="_")
+    probe.set_password("password")
+    password_hash = probe.password_hash
+
+    _insert(User, [
+        {
+            "id": i,
+            "username": f"user{i}",
+            "password_hash": password_hash,
+            "role": "admin" if i <= admins else "user",
+            "created_at": now - timedelta(days=365, seconds=i),
+        }
+        for i in range(1, users + 1)
+    ])
+    _insert(Tag, [{"id": i, "name": f"{WORDS[i % len(WORDS)]}{i}"} for i in range(1, tags + 1)])
+
+    visibilities = list(visibility_weights or {"public": 1})
+    weights = [visibility_weights[name] for name in visibilities] if visibility_weights else None
+
+    post_rows, post_tag_rows, media_rows, comment_rows, rating_rows = [], [], [], [], []
+    comment_id = rating_id = 0
+    for post_id in range(1, posts + 1):
+        created_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        post_rows.append({
+            "id": post_id,
+            "user_id": rng.randint(1, users),
+            "content": " ".join(rng.choice(WORDS) for _ in range(12)),
+            "visibility": rng.choices(visibilities, weights)[0] if weights else "public",
+            "created_at": created_at,
+        })
+        for tag_id in rng.sample(range(1, tags + 1), min(3, tags)):
+            post_tag_rows.append({"post_id": post_id, "tag_id": tag_id})
+        for _ in range(media_per_post):
+            digest = f"{rng.getrandbits(256):064x}"
+            media_rows.append({
+                "post_id": post_id,
+                "type": "image",
+                "url": f"/uploads/{digest}.jpg",
+                "digest": digest,
+                "status": "ready",
+                "created_at": created_at,
+            })
+        for _ in range(comments_per_post):
+            comment_id += 1
+            comment_rows.append({
+                "id": comment_id,
+                "post_id": post_id,
+                "user_id": rng.randint(1, users),
+                "content": rng.choice(WORDS),
+                "created_at": created_at + timedelta(minutes=rng.randint(1, 600)),
+            })
+        for user_id in rng.sample(range(1, users + 1), min(ratings_per_post, users)):
+            rating_id += 1
+            rating_rows.append({
+                "id": rating_id,
+                "post_id": post_id,
+                "user_id": user_id,
+                "score": rng.randint(1, 5),
+                "created_at": created_at,
+            })
+        if len(post_rows) >= CHUNK:
+            _flush(post_rows, post_tag_rows, media_rows, comment_rows, rating_rows)
+
+    _flush(post_rows, post_tag_rows, media_rows, comment_rows, rating_rows)
+
+    friend_rows = []
+    for user_id in range(1, users + 1):
+        for friend_id in rng.sample(range(1, users + 1), min(friends_per_user, users)):
+            if friend_id != user_id:
+                friend_rows.append(
+                    {"user_id": user_id, "friend_id": friend_id, "status": "accepted"}
+                )
+        if len(friend_rows) >= CHUNK:
+            _insert(Friend, friend_rows)
+            friend_rows.clear()
+    _insert(Friend, friend_rows)
+    counter_service.recompute()
+    friend_service.recount()
+    db.session.commit()
+
+
+def _flush(post_rows, post_tag_rows, media_rows, comment_rows, rating_rows):
+    _insert(Post, post_rows)
+    _insert(PostTag, post_tag_rows)
+    _insert(Media, media_rows)
+    _insert(Comment, comment_rows)
+    _insert(Rating, rating_rows)
+    for rows in (post_rows, post_tag_rows, media_rows, comment_rows, rating_rows):
+        rows.clear()
+
+
+def main():
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", required=True, help="SQLAlchemy URL of an empty database")
+    parser.add_argument("--scale", choices=SCALES, help="preset for --posts/--users")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=10000)
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--comments", type=int, default=3, help="comments per post")
+    parser.add_argument("--ratings", type=int, default=3, help="ratings per post")
+    parser.add_argument("--media", type=int, default=1, help="media rows per post")
+    parser.add_argument("--friends", type=int, default=10, help="friend links per user")
+    parser.add_argument("--admins", type=int, default=1, help="user1..userN become admins")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.scale:
+        args.posts, args.users = SCALES[args.scale]
+
+    class SeedConfig:
+        SQLALCHEMY_DATABASE_URI = args.database
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.create_all()
+        seed(users=args.users, posts=args.posts, tags=args.tags,
+             comments_per_post=args.comments, ratings_per_post=args.ratings,
+             friends_per_user=args.friends, media_per_post=args.media, admins=args.admins,
+             seed_value=args.seed)
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+    print(f"seeded {args.users} users / {args.posts} posts into {args.database}")
+    print("run `flask search-reindex`, `flask rebuild-trending` and `flask rebuild-timelines` "
+          "against it to fill the derived tables")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from config import TestingConfig
+
+
+@pytest.fixture
+def app(tmp_path):
+    class Config(TestingConfig):
+        UPLOAD_FOLDER = str(tmp_path / "uploads")
+        JWT_SECRET_KEY = "test-jwt-secret-" + "x" * 32
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Create a user and return ``(id, auth headers)``."""
+    from app.models import User
+
+    def make(username, role="user"):
+        with app.app_context():
+            user = User(username=username, role=role, password_hash="unused")
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=str(user.id))
+            return user.id, {"Authorization": f"Bearer {token}"}
+
+    return make
+
+
+class QueryCounter:
+    """Counts the SQL statements an engine executes inside the ``with`` block."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+@pytest.fixture
+def count_queries(app):
+    with app.app_context():
+        engine = db.engine
+    return lambda: QueryCounter(engine)
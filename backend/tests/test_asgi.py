@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from flask import request
+
+from app.asgi import AsgiAdapter
+
+
+def _scope(headers):
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/echo",
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+
+def _call(app, headers, chunks):
+    adapter = AsgiAdapter(app)
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    try:
+        asyncio.run(adapter(_scope(headers), receive, send))
+    finally:
+        adapter.executor.shutdown(wait=True)
+    status = sent[0]["status"]
+    return status, b"".join(message.get("body", b"") for message in sent[1:])
+
+
+@pytest.fixture
+def echo_app(app):
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return request.get_data()
+
+    return app
+
+
+def test_chunked_body_reaches_the_view(echo_app):
+    status, body = _call(
+        echo_app, [(b"transfer-encoding", b"chunked")], [b"abc", b"def"]
+    )
+    assert (status, body) == (200, b"abcdef")
+
+
+def test_body_without_content_length_reaches_the_view(echo_app):
+    status, body = _call(echo_app, [], [b"abc", b"def"])
+    assert (status, body) == (200, b"abcdef")
+
+
+def test_content_length_body_reaches_the_view(echo_app):
+    status, body = _call(echo_app, [(b"content-length", b"6")], [b"abcdef"])
+    assert (status, body) == (200, b"abcdef")
@@ -0,0 +1,41 @@
+import os
+import time
+
+from app.extensions import db
+from app.models import Media, Post
+
+KEPT = "a" * 64
+ORPHAN = "b" * 64
+
+
+def _touch(upload_dir, name, age):
+    path = os.path.join(upload_dir, name)
+    with open(path, "wb") as out:
+        out.write(b"x")
+    then = time.time() - age
+    os.utime(path, (then, then))
+    return path
+
+
+def test_gc_media_removes_orphans_past_the_grace_period(app, make_user):
+    user_id, _ = make_user("author")
+    upload_dir = app.config["UPLOAD_FOLDER"]
+    grace = app.config["MEDIA_GC_GRACE_SECONDS"]
+    with app.app_context():
+        post = Post(user_id=user_id, content="kept")
+        post.media_items.append(Media(type="image", url=f"/uploads/{KEPT}.jpg", digest=KEPT))
+        db.session.add(post)
+        db.session.commit()
+    kept = [_touch(upload_dir, f"{KEPT}{suffix}", grace * 2) for suffix in (".jpg", "_320.jpg")]
+    orphan = [
+        _touch(upload_dir, f"{ORPHAN}{suffix}", grace * 2)
+        for suffix in (".jpg", "_320.jpg", "_media.json")
+    ]
+    fresh = _touch(upload_dir, f"{'c' * 64}.jpg", 0)
+    other = _touch(upload_dir, "legacy.jpg", grace * 2)
+
+    result = app.test_cli_runner().invoke(args=["gc-media"])
+
+    assert "removed 1 unreferenced media blobs" in result.output
+    assert not any(os.path.exists(path) for path in orphan)
+    assert all(os.path.exists(path) for path in (*kept, fresh, other))
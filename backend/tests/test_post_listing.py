@@ -0,0 +1,48 @@
+"""Post listings must cost a fixed number of queries, whatever the page size."""
+import pytest
+
+from app.extensions import db
+from app.models import Comment, Media, Post, Rating, Tag
+
+# Total count, the page itself, then one selectin each for tags and media.
+LISTING_QUERIES = 4
+
+
+@pytest.fixture
+def posts(app, make_user):
+    author_ids = [make_user(f"author{i}")[0] for i in range(5)]
+    with app.app_context():
+        tags = [Tag(name=f"tag{i}") for i in range(10)]
+        for i in range(120):
+            post = Post(user_id=author_ids[i % 5], content=f"post {i}", tags=tags[i % 10:i % 10 + 2])
+            post.media_items.append(Media(type="image", url=f"/uploads/{i}.jpg"))
+            post.comments.append(Comment(user_id=author_ids[(i + 1) % 5], content="nice"))
+            post.ratings.append(Rating(user_id=author_ids[(i + 2) % 5], score=4))
+            db.session.add(post)
+        db.session.commit()
+
+
+def _queries_per_page(client, count_queries, path, headers=None):
+    counts = {}
+    for per_page in (10, 100):
+        with count_queries() as counter:
+            response = client.get(f"{path}?per_page={per_page}", headers=headers)
+        assert response.status_code == 200
+        assert len(response.get_json()["data"]["items"]) == per_page
+        counts[per_page] = counter.count
+    return counts
+
+
+@pytest.mark.usefixtures("posts")
+def test_public_listing_query_count_is_fixed(client, count_queries):
+    counts = _queries_per_page(client, count_queries, "/api/posts")
+    assert counts == {10: LISTING_QUERIES, 100: LISTING_QUERIES}
+
+
+@pytest.mark.usefixtures("posts")
+def test_admin_listing_query_count_is_fixed(client, count_queries, make_user):
+    _, headers = make_user("root", role="admin")
+    # Resolve the token's user first, so both pages hit a warm identity cache.
+    client.get("/api/users/me", headers=headers)
+    counts = _queries_per_page(client, count_queries, "/api/admin/posts", headers)
+    assert counts == {10: LISTING_QUERIES, 100: LISTING_QUERIES}
@@ -0,0 +1,35 @@
+"""Post and comment-list validators move on when an embedded author profile changes."""
+
+
+def _get(client, path, etag=None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get(path, headers=headers)
+
+
+def test_profile_change_refreshes_posts_and_comments(client, make_user):
+    _, author = make_user("author")
+    _, commenter = make_user("commenter")
+    post_id = client.post("/api/posts", headers=author, json={"content": "hi"}).get_json()[
+        "data"]["post"]["id"]
+    client.post(f"/api/posts/{post_id}/comments", headers=commenter, json={"content": "yo"})
+
+    post = _get(client, f"/api/posts/{post_id}")
+    comments = _get(client, f"/api/posts/{post_id}/comments")
+    assert _get(client, f"/api/posts/{post_id}", post.headers["ETag"]).status_code == 304
+
+    # Same values: nothing the payload shows has changed.
+    client.put("/api/users/me", headers=author, json={"username": "author"})
+    assert _get(client, f"/api/posts/{post_id}", post.headers["ETag"]).status_code == 304
+
+    client.put("/api/users/me", headers=author, json={"username": "renamed", "avatar": "/a.png"})
+    fresh = _get(client, f"/api/posts/{post_id}", post.headers["ETag"])
+    assert fresh.status_code == 200
+    assert fresh.get_json()["data"]["post"]["username"] == "renamed"
+    assert fresh.get_json()["data"]["post"]["avatar"] == "/a.png"
+    # The anonymous cache entry was dropped too.
+    assert _get(client, f"/api/posts/{post_id}").get_json()["data"]["post"]["username"] == "renamed"
+
+    client.put("/api/users/me", headers=commenter, json={"username": "commenter2"})
+    fresh = _get(client, f"/api/posts/{post_id}/comments", comments.headers["ETag"])
+    assert fresh.status_code == 200
+    assert fresh.get_json()["data"]["items"][0]["username"] == "commenter2"
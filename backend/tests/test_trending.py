@@ -0,0 +1,54 @@
+"""Trending counts public posts only, following visibility changes."""
+from app.extensions import db
+from app.models import TagUsage
+from app.services import trending_service
+
+
+def _trending(client):
+    return {tag["name"]: tag["count"] for tag in client.get("/api/tags/trending").get_json()["data"]["tags"]}
+
+
+def _usage(app):
+    with app.app_context():
+        return sum(usage.count for usage in TagUsage.query.all())
+
+
+def test_hidden_posts_do_not_trend(app, client, make_user):
+    _, headers = make_user("author")
+    _trending(client)  # load the tracker so later commits are folded in live
+
+    def create(visibility, tag):
+        response = client.post(
+            "/api/posts", headers=headers,
+            json={"content": tag, "tags": [tag], "visibility": visibility},
+        )
+        return response.get_json()["data"]["post"]["id"]
+
+    def update(post_id, **fields):
+        assert client.put(f"/api/posts/{post_id}", headers=headers, json=fields).status_code == 200
+
+    private = create("private", "secrettag")
+    create("friends", "friendstag")
+    public = create("public", "opentag")
+    assert _trending(client) == {"opentag": 1}
+
+    update(private, visibility="public")
+    assert _trending(client) == {"opentag": 1, "secrettag": 1}
+    update(public, visibility="friends", tags=["opentag", "newtag"])
+    assert _trending(client) == {"secrettag": 1}
+    update(private, visibility="private")
+    update(private, tags=["secrettag", "other"])
+    assert _trending(client) == {}
+    assert _usage(app) == 0
+
+    update(public, visibility="public")
+    assert client.delete(f"/api/posts/{public}", headers=headers).status_code == 200
+    assert client.delete(f"/api/posts/{private}", headers=headers).status_code == 200
+    assert _trending(client) == {}
+    assert _usage(app) == 0
+
+    create("private", "secrettag")
+    create("public", "opentag")
+    with app.app_context():
+        trending_service.rebuild()
+    assert _trending(client) == {"opentag": 1}
@@ -0,0 +1,44 @@
+import io
+import os
+
+from PIL import Image
+
+from app.services import media_service
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), (10, 20, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_processing_records_are_not_served(app, client):
+    upload_dir = app.config["UPLOAD_FOLDER"]
+    data = client.post(
+        "/api/upload", data={"file": (io.BytesIO(_png()), "a.png", "image/png")}
+    ).get_json()["data"]
+    digest = data["sha256"]
+    assert data["status"] == "ready"
+    assert os.path.exists(os.path.join(upload_dir, ".media", f"{digest}.json"))
+
+    blob = client.get(f"/uploads/{data['filename']}")
+    assert blob.status_code == 200
+    assert "immutable" in blob.headers["Cache-Control"]
+    assert client.get(f"/uploads/{digest}_320.jpg").status_code == 200
+    assert client.get(f"/uploads/.media/{digest}.json").status_code == 404
+    # Records written next to the blob by older releases stay private too.
+    with open(os.path.join(upload_dir, f"{digest}_media.json"), "w") as out:
+        out.write("{}")
+    assert client.get(f"/uploads/{digest}_media.json").status_code == 404
+
+
+def test_released_blob_takes_its_record_along(app, client):
+    app.config["MEDIA_GC_GRACE_SECONDS"] = -1
+    digest = client.post(
+        "/api/upload", data={"file": (io.BytesIO(_png()), "a.png", "image/png")}
+    ).get_json()["data"]["sha256"]
+    with app.app_context():
+        assert media_service.release([digest]) == {digest}
+    upload_dir = app.config["UPLOAD_FOLDER"]
+    assert not os.path.exists(os.path.join(upload_dir, ".media", f"{digest}.json"))
+    assert not [name for name in os.listdir(upload_dir) if name.startswith(digest)]
@@ -0,0 +1,13 @@
+"""Production WSGI entry point, normally started as ``gunicorn wsgi:app``.
+
+gunicorn reads gunicorn.conf.py from this directory, which preloads this
+module in the master process (see app/prefork.py).
+"""
+import os
+
+os.environ.setdefault("FLASK_CONFIG", "production")
+
+from app import create_app  # noqa: E402
+from app.prefork import load  # noqa: E402
+
+app = load(create_app)